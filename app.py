@@ -1,138 +1,145 @@
 import streamlit as st
 import pandas as pd
 import math
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from io import BytesIO
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side
+import os
+from rebar.core import REBAR_DB, hook_lengths, bar_length, slab_bar_count, stirrup_length, stirrup_count, spiral_length, spiral_lap, make_item
+from rebar.lap_table import lap_length
+from rebar.report import ReportCache, items_to_columns, cut_list
+from rebar.cutting import cutting_plan
+from rebar.export import cached_export_excel, report_digest
+from rebar.section_svg import section_svg
+from rebar.sweep import sweep
+from rebar.schedule import SCHEDULE_COLUMNS, parse_schedule, read_schedule
+from rebar.store import ProjectStore
+from rebar.items import ItemTable, memory_report
+from rebar.instrument import RerunTimer
 
 # === 1. 頁面設定 ===
 st.set_page_config(page_title="鋼筋撿料大師 v23.0 (計算式完整版)", page_icon="🏗️", layout="wide")
 
 # === 2. 初始化 Session State ===
-if 'raw_data_list' not in st.session_state:
-    st.session_state['raw_data_list'] = []
-
-# === 3. 鋼筋基本資料 (CNS 560) ===
-REBAR_DB = {
-    '#3': {'dia': 0.953, 'weight': 0.560, 'db': 0.953},
-    '#4': {'dia': 1.270, 'weight': 0.994, 'db': 1.27},
-    '#5': {'dia': 1.590, 'weight': 1.560, 'db': 1.59},
-    '#6': {'dia': 1.910, 'weight': 2.250, 'db': 1.91},
-    '#7': {'dia': 2.220, 'weight': 3.040, 'db': 2.22},
-    '#8': {'dia': 2.540, 'weight': 3.980, 'db': 2.54},
-    '#9': {'dia': 2.870, 'weight': 5.060, 'db': 2.87},
-    '#10': {'dia': 3.220, 'weight': 6.370, 'db': 3.22},
-    '#11': {'dia': 3.580, 'weight': 7.907, 'db': 3.58}
+# 側邊欄參數 (以 widget key 存於 session，可隨專案存檔/載入)
+PARAM_DEFAULTS = {
+    "project_name": "CDC防疫中心", "contact_person": "范嘉文", "structure_part": "洗車台",
+    "fc_mode": 280, "fc_custom": 280, "fy_mode": 4200, "fy_custom": 4200, "lap_interp": False,
+    "stock_m": 12, "global_cover": 4.0, "unit_price": 23000, "auto_split": True,
 }
 
-# === 4. S7-01 標準圖數位化資料庫 ===
-S7_DATA = {
-    4200: {
-        210: { 'tension_B': {'#3':55, '#4':73, '#5':91, '#6':110, '#7':158, '#8':181, '#9':205, '#10':229, '#11':255}, 'tension_Top': {'#3':71, '#4':95, '#5':118, '#6':142, '#7':206, '#8':235, '#9':266, '#10':298, '#11':331}, 'compression': {'#3':30, '#4':39, '#5':49, '#6':59, '#7':69, '#8':78, '#9':88, '#10':99, '#11':110}, 'develop': {'#3':42, '#4':56, '#5':70, '#6':84, '#7':122, '#8':139, '#9':157, '#10':177, '#11':196} },
-        245: { 'tension_B': {'#3':51, '#4':68, '#5':85, '#6':101, '#7':147, '#8':168, '#9':189, '#10':212, '#11':236}, 'tension_Top': {'#3':66, '#4':88, '#5':110, '#6':132, '#7':190, '#8':218, '#9':246, '#10':276, '#11':307}, 'compression': {'#3':30, '#4':39, '#5':49, '#6':59, '#7':69, '#8':78, '#9':88, '#10':99, '#11':110}, 'develop': {'#3':39, '#4':52, '#5':65, '#6':78, '#7':113, '#8':129, '#9':146, '#10':164, '#11':182} },
-        280: { 'tension_B': {'#3':48, '#4':63, '#5':79, '#6':95, '#7':137, '#8':157, '#9':177, '#10':199, '#11':221}, 'tension_Top': {'#3':62, '#4':82, '#5':103, '#6':123, '#7':178, '#8':204, '#9':230, '#10':258, '#11':287}, 'compression': {'#3':30, '#4':39, '#5':49, '#6':59, '#7':69, '#8':78, '#9':88, '#10':99, '#11':110}, 'develop': {'#3':37, '#4':49, '#5':61, '#6':73, '#7':106, '#8':121, '#9':136, '#10':153, '#11':170} },
-        350: { 'tension_B': {'#3':43, '#4':57, '#5':71, '#6':85, '#7':123, '#8':140, '#9':159, '#10':178, '#11':198}, 'tension_Top': {'#3':55, '#4':74, '#5':92, '#6':110, '#7':159, '#8':182, '#9':206, '#10':231, '#11':257}, 'compression': {'#3':30, '#4':39, '#5':49, '#6':59, '#7':69, '#8':78, '#9':88, '#10':99, '#11':110}, 'develop': {'#3':33, '#4':44, '#5':55, '#6':65, '#7':95, '#8':108, '#9':122, '#10':137, '#11':152} }
-    },
-    2800: {
-        210: { 'tension_B': {'#3':37, '#4':49, '#5':61, '#6':73, '#7':106, '#8':121, '#9':137, '#10':153, '#11':170}, 'tension_Top': {'#3':48, '#4':63, '#5':79, '#6':95, '#7':137, '#8':157, '#9':177, '#10':199, '#11':221}, 'compression': {'#3':30, '#4':30, '#5':33, '#6':40, '#7':46, '#8':52, '#9':59, '#10':66, '#11':74}, 'develop': {'#3':30, '#4':38, '#5':47, '#6':56, '#7':81, '#8':93, '#9':105, '#10':118, '#11':131} },
-        280: { 'tension_B': {'#3':32, '#4':42, '#5':53, '#6':63, '#7':92, '#8':105, '#9':118, '#10':133, '#11':147}, 'tension_Top': {'#3':41, '#4':55, '#5':69, '#6':82, '#7':119, '#8':136, '#9':154, '#10':172, '#11':192}, 'compression': {'#3':30, '#4':30, '#5':33, '#6':40, '#7':46, '#8':52, '#9':59, '#10':66, '#11':74}, 'develop': {'#3':30, '#4':33, '#5':41, '#6':49, '#7':71, '#8':81, '#9':91, '#10':102, '#11':114} }
-    }
-}
+@st.cache_resource
+def get_store():
+    return ProjectStore(os.environ.get("REBAR_STORE", "rebar_projects.db"))
+
+store = get_store()
+
+def reset_selection():
+    # 表格勾選狀態綁定於 widget key：資料列位移後改用新 key，避免舊勾選位置指到其他項目
+    st.session_state['grid_nonce'] = st.session_state.get('grid_nonce', 0) + 1
+
+def load_project(name):
+    reset_selection()
+    params, cols = store.load(name)
+    for k, v in PARAM_DEFAULTS.items(): st.session_state[k] = params.get(k, v)
+    st.session_state['project_name'] = st.session_state['_project'] = name
+    st.query_params["project"] = name  # 重新整理頁面時開啟同一專案
+    st.session_state['_saved_params'] = {k: st.session_state[k] for k in PARAM_DEFAULTS}
+    # 欄式資料直接交給報表快取一次展開
+    st.session_state['report_cache'] = ReportCache()
+    st.session_state['report_cache'].load_columns(cols, st.session_state['stock_m'] * 100, st.session_state['auto_split'])
+    st.session_state['raw_data_list'] = ItemTable.from_columns(cols)
+
+if 'raw_data_list' not in st.session_state:
+    st.session_state['raw_data_list'] = ItemTable()
+    st.session_state['report_cache'] = ReportCache()
+    # 新 session 只開啟網址指定的專案 (?project=名稱)；否則為新專案，預設名稱與既有專案重複時加上編號
+    url_project = st.query_params.get("project")
+    if url_project and store.exists(url_project): load_project(url_project)
+    else:
+        name = base = url_project or PARAM_DEFAULTS['project_name']; n = 1
+        while not url_project and store.exists(name): n += 1; name = f"{base} ({n})"
+        st.session_state['project_name'] = st.session_state['_project'] = name
+        st.query_params["project"] = name
+if not isinstance(st.session_state['raw_data_list'], ItemTable):  # 外部設定的 list of dict 轉為欄式容器
+    st.session_state['raw_data_list'] = ItemTable(st.session_state['raw_data_list'])
+if 'report_cache' not in st.session_state:
+    st.session_state['report_cache'] = ReportCache()
+for k, v in PARAM_DEFAULTS.items(): st.session_state.setdefault(k, v)
 
-# === 5. 核心查表功能 ===
-def lookup_data(fc, fy, size, type_mode, is_top=False):
-    val = 0; desc = "請手動輸入"
-    try:
-        fy_table = S7_DATA.get(fy)
-        if fy_table:
-            fc_table = fy_table.get(fc)
-            if fc_table:
-                key = ""
-                if type_mode == 'compression': key = 'compression'
-                elif type_mode == 'develop': key = 'develop'
-                else: key = 'tension_Top' if is_top else 'tension_B'
-                val = fc_table[key].get(size, 0)
-                if val > 0: desc = "標準圖查表"
-    except: pass
-    if val == 0:
-        db = REBAR_DB[size]['db']
-        desc = "公式估算"
-        if type_mode == 'compression': val = max(math.ceil(0.043 * fy * db), 20)
-        else:
-            factor = 46 * (fy / 4200) * math.sqrt(280 / fc)
-            if is_top: factor *= 1.3
-            val = math.ceil(factor * db * 1.3)
-    return val, desc
-
-# === 自動拆料演算法 ===
-def split_rebar(req_len, stock_len, lap_len):
-    if req_len <= stock_len:
-        return [req_len]
-    pieces = []
-    rem = req_len
-    while rem > stock_len:
-        pieces.append(stock_len)
-        rem -= (stock_len - lap_len)
-    pieces.append(rem)
-    return pieces
+# 效能診斷：勾選側邊欄「效能診斷」後才計時 (停用時各階段僅多一次判斷)
+TIMING_LOG = os.environ.get("REBAR_TIMING_LOG", "rebar_timing.jsonl")
+timer = RerunTimer(st.session_state.get('diag', False), TIMING_LOG if st.session_state.get('diag_log', False) else None)
+diag_state = st.session_state.setdefault('diag_state', {})  # 下載檔案於 rerun 後才產生，其計時存於此
 
 # === 刪除與清空 ===
-def delete_item(raw_idx): 
-    st.session_state['raw_data_list'].pop(raw_idx)
+# 存檔依各筆的 SQLite id 刪除 (只刪除本 session 清單中的項目)
+def delete_items(raw_idxs):
+    reset_selection()
+    raw_idxs = sorted(set(raw_idxs), reverse=True)
+    table = st.session_state['raw_data_list']
+    store.delete_items(st.session_state['project_name'], table.ids()[raw_idxs].tolist())
+    st.session_state['report_cache'].delete(raw_idxs)
+    table.delete(raw_idxs)
 def clear_all_data(): 
-    st.session_state['raw_data_list'] = []
-
-# === 繪圖 ===
-def plot_section(shape, dims, cover):
-    fig, ax = plt.subplots(figsize=(3, 3))
-    if shape == 'rect':
-        w, h = dims['w'], dims['h']
-        rect_conc = patches.Rectangle((0, 0), w, h, linewidth=2, edgecolor='#333333', facecolor='#f0f0f0')
-        ax.add_patch(rect_conc)
-        if w > 2*cover and h > 2*cover:
-            rect_stir = patches.Rectangle((cover, cover), w-2*cover, h-2*cover, linewidth=1.5, edgecolor='red', linestyle='--', facecolor='none')
-            ax.add_patch(rect_stir)
-        ax.set_xlim(-10, w+10); ax.set_ylim(-10, h+10)
-    elif shape == 'circle':
-        d = dims['d']; r = d / 2
-        circ_conc = patches.Circle((r, r), r, linewidth=2, edgecolor='#333333', facecolor='#f0f0f0')
-        ax.add_patch(circ_conc)
-        if r > cover:
-            circ_stir = patches.Circle((r, r), r-cover, linewidth=1.5, edgecolor='red', linestyle='--', facecolor='none')
-            ax.add_patch(circ_stir)
-        ax.set_xlim(-10, d+10); ax.set_ylim(-10, d+10)
-    ax.set_aspect('equal'); ax.axis('off')
-    return fig
+    reset_selection()
+    store.delete_items(st.session_state['project_name'], st.session_state['raw_data_list'].ids().tolist())
+    st.session_state['raw_data_list'].clear()
+    st.session_state['report_cache'].clear()
+def save_as_project():
+    # 變更建案名稱 = 另存為新專案 (原專案保留)；名稱已存在時不覆寫，改回原名稱
+    name = st.session_state['project_name']
+    params = {k: st.session_state[k] for k in PARAM_DEFAULTS}
+    table = st.session_state['raw_data_list']
+    try: table.ids()[:] = store.save_as(name, table, params)
+    except ValueError as e:
+        st.session_state['project_name'] = st.session_state['_project']
+        st.session_state['_flash'] = f"{e}，未另存。如需編輯該專案請由「💾 專案存檔」開啟。"
+        return
+    st.session_state['_project'] = name; st.session_state['_saved_params'] = params
+    st.query_params["project"] = name
 
 # === 8. 側邊欄設定 ===
-with st.sidebar:
+with st.sidebar, timer.stage("sidebar"):
     st.header("⚙️ 專案參數設定")
-    project_name = st.text_input("建案名稱", value="CDC防疫中心")
-    contact_person = st.text_input("聯絡人", value="范嘉文")
-    structure_part = st.text_input("結構部位", value="洗車台")
+    project_name = st.text_input("建案名稱", key="project_name", on_change=save_as_project)
+    if '_flash' in st.session_state: st.error(st.session_state.pop('_flash'))
+    contact_person = st.text_input("聯絡人", key="contact_person")
+    structure_part = st.text_input("結構部位", key="structure_part")
     st.markdown("---")
     
     st.subheader("2. 材料強度")
-    fc_mode = st.selectbox("混凝土 f'c", [210, 245, 280, 350, "自訂"], index=2)
-    fc = st.number_input("輸入 f'c", value=280, step=5) if fc_mode == "自訂" else fc_mode
-    fy_mode = st.selectbox("鋼筋 f_y", [2800, 4200, "自訂"], index=1)
-    fy = st.number_input("輸入 f_y", value=4200, step=100) if fy_mode == "自訂" else fy_mode
+    fc_mode = st.selectbox("混凝土 f'c", [210, 245, 280, 350, "自訂"], key="fc_mode")
+    fc = st.number_input("輸入 f'c", step=5, key="fc_custom") if fc_mode == "自訂" else fc_mode
+    fy_mode = st.selectbox("鋼筋 f_y", [2800, 4200, "自訂"], key="fy_mode")
+    fy = st.number_input("輸入 f_y", step=100, key="fy_custom") if fy_mode == "自訂" else fy_mode
+    lap_interp = st.checkbox("非表列 f'c 以標準圖內插", key="lap_interp", help="f'c 介於 S7-01 表列值之間時線性內插 (無條件進位)，否則以公式估算")
     
-    stock_len = st.selectbox("鋼筋定尺 (m)", [9, 10, 12, 14, 15], index=2) * 100
-    global_cover = st.number_input("預設保護層 (cm)", value=4.0, step=0.5)
-    unit_price = st.number_input("鋼筋單價 (元/噸)", value=23000, step=500)
+    stock_len = st.selectbox("鋼筋定尺 (m)", [9, 10, 12, 14, 15], key="stock_m") * 100
+    global_cover = st.number_input("預設保護層 (cm)", step=0.5, key="global_cover")
+    unit_price = st.number_input("鋼筋單價 (元/噸)", step=500, key="unit_price")
     
     st.markdown("---")
     st.subheader("3. 動態撿料設定")
-    auto_split = st.checkbox("✅ 啟用自動拆料", value=True, help="變更此選項，右側表格會瞬間切換顯示模式！")
+    auto_split = st.checkbox("✅ 啟用自動拆料", key="auto_split", help="變更此選項，右側表格會瞬間切換顯示模式！")
+    cut_stocks = st.multiselect("排料可用定尺 (m)", [9, 10, 12, 14, 15], default=[stock_len // 100], help="將所有裁切長度套裁至所選定尺，計算用料支數與損耗率")
+    cut_improve = st.checkbox("排料最佳化 (改用最短可用定尺)", value=True)
+
+    st.markdown("---")
+    with st.expander("💾 專案存檔"):
+        saved = store.projects()
+        st.caption(f"自動儲存至 {store.path}，新增/刪除即時寫入；網址加上 ?project=名稱 可直接開啟專案")
+        if saved:
+            n_saved = {name: n for name, n, _ in saved}
+            open_name = st.selectbox("已存專案", list(n_saved), format_func=lambda n: f"{n} ({n_saved[n]} 筆)")
+            st.button("📂 開啟專案", on_click=load_project, args=(open_name,))
+    # 參數有變更時才寫入 (尚無項目的新專案不建立存檔)
+    params = {k: st.session_state[k] for k in PARAM_DEFAULTS}
+    if params != st.session_state.get('_saved_params') and (len(st.session_state['raw_data_list']) or store.exists(project_name)):
+        store.save_params(project_name, params); st.session_state['_saved_params'] = params
 
 # === 9. 主畫面 ===
 st.title("🏗️ 鋼筋撿料大師 v23.0")
 st.caption(f"即時互動引擎: {'🚀 啟用自動拆料' if auto_split else '📦 關閉拆料(合併顯示)'} | 定尺 {stock_len/100}m")
 
-with st.expander("➕ 新增撿料項目", expanded=True):
+with st.expander("➕ 新增撿料項目", expanded=True), timer.stage("form/preview"):
     col_input, col_viz = st.columns([2, 1])
     
     with col_input:
@@ -144,16 +151,16 @@ with st.expander("➕ 新增撿料項目", expanded=True):
         mode = st.radio("模式選擇", ["主筋 (梁/柱直料)", "版/牆筋 (依間距)", "箍筋 (Stirrup)", "螺旋箍筋 (Spiral)"], horizontal=True)
         
         db = REBAR_DB[size_key]['db']
-        h90 = math.ceil(max(12*db, 15)); h180 = math.ceil(max(4*db, 6.5))
+        h90, h180 = hook_lengths(size_key)
         
         suggested_lap = 0; lap_desc = ""; is_top = False
         if "主筋" in mode or "版/牆" in mode:
             is_col = st.checkbox("是柱子/受壓構件?", value=False)
             if not is_col:
                 is_top = st.checkbox("頂層筋 (Top Bar)?", value=False)
-                suggested_lap, lap_desc = lookup_data(fc, fy, size_key, 'tension', is_top)
+                suggested_lap, lap_desc = lap_length(fc, fy, size_key, 'tension', is_top, lap_interp)
             else:
-                suggested_lap, lap_desc = lookup_data(fc, fy, size_key, 'compression')
+                suggested_lap, lap_desc = lap_length(fc, fy, size_key, 'compression', interpolate=lap_interp)
         
         inputs = {}
         
@@ -166,22 +173,15 @@ with st.expander("➕ 新增撿料項目", expanded=True):
             with c1: inputs['P'] = st.number_input("間距 Pitch (cm)", value=15.0)
             with c2: inputs['count'] = st.number_input("總支數", min_value=1, value=1)
             
-            if inputs['D'] > 0 and inputs['P'] > 0:
-                core_d = inputs['D'] - 2*cover
-                circ = math.pi * core_d
-                one_turn = math.sqrt(circ**2 + inputs['P']**2)
-                suggested_lap_spiral = 1.5 * one_turn
-            else: suggested_lap_spiral = 0
-            
             st.markdown(f"👇 **搭接設定 (建議值: 1.5圈)**")
-            inputs['manual_lap'] = st.number_input("搭接長度", value=float(f"{suggested_lap_spiral:.1f}"), step=1.0)
+            inputs['manual_lap'] = st.number_input("搭接長度", value=spiral_lap(inputs['D'], inputs['P'], cover), step=1.0)
 
         elif "主筋" in mode:
             c_a, c_b = st.columns(2)
             with c_a: inputs['L'] = st.number_input("實際跨距/淨長 (cm)", min_value=0.0)
             with c_b: inputs['count'] = st.number_input("支數", min_value=1, value=1)
             st.markdown(f"👇 **搭接設定 ({lap_desc})**")
-            inputs['manual_lap'] = st.number_input("搭接長度", value=int(suggested_lap), step=1, key=f"lap_main_{fc}_{fy}_{size_key}_{is_top}_{is_col}")
+            inputs['manual_lap'] = st.number_input("搭接長度", value=int(suggested_lap), step=1, key=f"lap_main_{fc}_{fy}_{size_key}_{is_top}_{is_col}_{lap_interp}")
             c_c, c_d = st.columns(2)
             with c_c: inputs['hL'] = st.selectbox("左鉤", ["平切", "90度", "180度"])
             with c_d: inputs['hR'] = st.selectbox("右鉤", ["平切", "90度", "180度"])
@@ -195,10 +195,10 @@ with st.expander("➕ 新增撿料項目", expanded=True):
             
             r_len = inputs['range_len']
             spc = inputs['spacing']
-            calc_count = math.ceil(r_len / spc) + 1 if r_len > 0 else 1
+            calc_count = slab_bar_count(r_len, spc)
             inputs['count'] = st.number_input("總支數 (自動計算)", value=int(calc_count), min_value=1, key=f"count_slab_{r_len}_{spc}")
             st.markdown(f"👇 **搭接設定 ({lap_desc})**")
-            inputs['manual_lap'] = st.number_input("搭接長度", value=int(suggested_lap), step=1, key=f"lap_slab_{fc}_{fy}_{size_key}_{is_top}")
+            inputs['manual_lap'] = st.number_input("搭接長度", value=int(suggested_lap), step=1, key=f"lap_slab_{fc}_{fy}_{size_key}_{is_top}_{lap_interp}")
             c_c, c_d = st.columns(2)
             with c_c: inputs['hL'] = st.selectbox("左鉤", ["平切", "90度", "180度"])
             with c_d: inputs['hR'] = st.selectbox("右鉤", ["平切", "90度", "180度"])
@@ -226,7 +226,7 @@ with st.expander("➕ 新增撿料項目", expanded=True):
         if "螺旋" in mode:
             d_val = inputs.get('D', 0)
             if d_val > 0:
-                st.pyplot(plot_section('circle', {'d': d_val}, cover))
+                with timer.stage("section_svg"): st.image(section_svg('circle', {'d': d_val}, cover))
                 core_d = d_val - 2*cover
                 circ = math.pi * core_d
                 p_val = inputs.get('P', 15.0)
@@ -240,7 +240,7 @@ with st.expander("➕ 新增撿料項目", expanded=True):
             w_val = inputs.get('W', 0)
             h_val = inputs.get('H', 0)
             if w_val > 0 and h_val > 0:
-                st.pyplot(plot_section('rect', {'w': w_val, 'h': h_val}, cover))
+                with timer.stage("section_svg"): st.image(section_svg('rect', {'w': w_val, 'h': h_val}, cover))
                 cw = w_val - 2*cover
                 ch = h_val - 2*cover
                 hook_s = max(24*db, 20)
@@ -297,133 +297,171 @@ with st.expander("➕ 新增撿料項目", expanded=True):
     # === 運算加入邏輯 (儲存原始資料) ===
     if btn_add:
         try:
-            uw = REBAR_DB[size_key]['weight']
-            hook_map = {"平切": 0, "90度": h90, "180度": h180}
-            base_len = 0
             final_count = inputs.get('count', 1)
-            shape_str = ""
-            sys_mode = "main"
 
             if "主筋" in mode or "版/牆" in mode:
-                if inputs['L'] <= 0: raise ValueError("長度需大於0")
-                net = inputs['L'] - (2 * cover)
-                base_len = net + hook_map[inputs.get('hL', '平切')] + hook_map[inputs.get('hR', '平切')]
+                base_len = bar_length(inputs['L'], cover, size_key, inputs.get('hL', '平切'), inputs.get('hR', '平切'))
                 shape_str = f"L={inputs['L']}"
                 sys_mode = "main"
 
             elif "螺旋" in mode:
-                if inputs['D'] <= 0 or inputs['P'] <= 0: raise ValueError("請輸入正確尺寸")
-                core_d = inputs['D'] - 2*cover
-                circ = math.pi * core_d
-                one_turn = math.sqrt(circ**2 + inputs['P']**2)
-                base_len = (one_turn * (inputs['L'] / inputs['P'])) + (3.0 * circ)
+                base_len = spiral_length(inputs['D'], inputs['L'], inputs['P'], cover)
                 shape_str = f"◎ D={inputs['D']}"
                 sys_mode = "main"
 
             elif "箍筋" in mode:
-                cw = inputs['W'] - 2*cover; ch = inputs['H'] - 2*cover
-                base_len = (cw+ch)*2 + max(24*db, 20)
+                base_len = stirrup_length(inputs['W'], inputs['H'], cover, size_key)
                 if inputs['st_type'] == 'auto':
-                    if inputs['sE'] <= 0: final_count = math.ceil(inputs['Span'] / inputs['sC']) + 1
-                    else:
-                        zE = 2*inputs['H']
-                        if zE*2 >= inputs['Span']: final_count = math.ceil(inputs['Span']/inputs['sE']) + 1
-                        else:
-                            final_count = math.ceil(zE/inputs['sE'])*2 + math.ceil((inputs['Span'] - 2*zE)/inputs['sC']) + 1
+                    final_count = stirrup_count(inputs['Span'], inputs['H'], inputs['sE'], inputs['sC'])
                 shape_str = f"口 {inputs['W']}x{inputs['H']}"
                 sys_mode = "stirrup"
 
-            st.session_state['raw_data_list'].append({
-                "mode": sys_mode, "size_key": size_key, "shape_str": shape_str,
-                "base_len": base_len, "lap_len": inputs.get('manual_lap', 0),
-                "count": final_count, "uw": uw, "note": note_input
-            })
+            item = make_item(sys_mode, size_key, shape_str, base_len, inputs.get('manual_lap', 0), final_count, note_input)
+            st.session_state['report_cache'].append(item, stock_len, auto_split)
+            st.session_state['raw_data_list'].append(item, store.append_item(project_name, item))
             st.success("已加入原始資料！請見下方報表。")
             st.rerun()
 
         except Exception as e: st.error(f"錯誤: {e}")
 
+# === 批次構件表 (梁/柱箍筋、樁螺旋箍筋) ===
+with st.expander("📑 批次構件表 (梁/柱箍筋、樁螺旋箍筋)"):
+    st.caption("type 填 梁/柱 (箍筋) 或 樁 (螺旋箍筋)；箍筋未填 count 時依 Span 與 2H 加密區計算，螺旋箍筋未填 lap 時為 1.5 圈。保護層與備註未填時使用預設值。")
+    sched_file = st.file_uploader("匯入構件表 (CSV/XLSX)", type=["csv", "xlsx"])
+    try: sched_src = read_schedule(sched_file) if sched_file else pd.DataFrame(columns=SCHEDULE_COLUMNS)
+    except Exception as e: st.error(f"讀取失敗: {e}"); sched_src = pd.DataFrame(columns=SCHEDULE_COLUMNS)
+    sched_df = st.data_editor(sched_src.reindex(columns=SCHEDULE_COLUMNS).astype({"type": object, "size": object, "note": object}),
+                              num_rows="dynamic", use_container_width=True, hide_index=True,
+                              key=f"schedule_{sched_file.file_id if sched_file else ''}")
+    skip_bad = st.checkbox("略過錯誤列，其餘照常加入", value=False)
+    if st.button("➕ 全部加入清單", disabled=sched_df.empty):
+        with timer.stage("schedule", rows=len(sched_df)):
+            new_items, sched_errors = parse_schedule(sched_df, global_cover, structure_part, stock_len=stock_len)
+            if sched_errors:
+                st.error(f"{len(sched_errors)} 列資料有誤" + ("，已略過" if skip_bad else "，未加入任何項目"))
+                st.dataframe(pd.DataFrame(sched_errors, columns=["列", "錯誤"]), hide_index=True, use_container_width=True)
+            if new_items and (skip_bad or not sched_errors):
+                try:
+                    st.session_state['report_cache'].extend(new_items, stock_len, auto_split)
+                    st.session_state['raw_data_list'].extend(new_items, store.append_items(project_name, new_items))
+                    st.success(f"已加入 {len(new_items)} 筆原始資料！請見下方報表。")
+                except Exception as e: st.error(f"錯誤: {e}")
+
 # === 10. 即時報表產生引擎 ===
 st.divider()
 st.subheader("📋 即時運算加工明細表")
 
-display_data = []
+# 逐筆展開結果快取於 session，僅新增/刪除的項目需要重新計算
+report_cache = st.session_state['report_cache']
+try:
+    with timer.stage("report", items=len(st.session_state['raw_data_list'])):
+        df = report_cache.sync(st.session_state['raw_data_list'], stock_len, auto_split).frame()
+    timer.count("report", rows=len(df))
+except ValueError as e: st.error(f"錯誤: {e}"); df = pd.DataFrame()
 
-for raw_idx, item in enumerate(st.session_state.get('raw_data_list', [])):
-    b_len = item['base_len']
-    count = item['count']
-    lap = item['lap_len']
-    uw = item['uw']
-    
-    if item['mode'] == 'stirrup' or b_len <= stock_len:
-        display_data.append({
-            "raw_idx": raw_idx, "番號": item['size_key'], "形狀": item['shape_str'],
-            "單支長": round(b_len, 1), "支數": int(count), "總長(cm)": round(b_len * count, 1),
-            "單位重": uw, "總重": round((b_len/100)*uw*count, 2), "備註": item['note']
-        })
-    else:
-        if auto_split:
-            pieces = split_rebar(b_len, stock_len, lap)
-            for p_idx, p_len in enumerate(pieces):
-                part_note = item['note'] + f" (Part {p_idx+1}/{len(pieces)} {'定尺' if p_len==stock_len else '餘料'})"
-                display_data.append({
-                    "raw_idx": raw_idx, "番號": item['size_key'], "形狀": item['shape_str'],
-                    "單支長": round(p_len, 1), "支數": int(count), "總長(cm)": round(p_len * count, 1),
-                    "單位重": uw, "總重": round((p_len/100)*uw*count, 2), "備註": part_note
-                })
-        else:
-            laps = math.floor(b_len / stock_len)
-            if b_len % stock_len == 0: laps -= 1
-            total_merge_len = b_len + laps * lap
-            merge_note = item['note'] + f" (含搭接{laps}處)"
-            display_data.append({
-                "raw_idx": raw_idx, "番號": item['size_key'], "形狀": item['shape_str'],
-                "單支長": round(total_merge_len, 1), "支數": int(count), "總長(cm)": round(total_merge_len * count, 1),
-                "單位重": uw, "總重": round((total_merge_len/100)*uw*count, 2), "備註": merge_note
-            })
-
-if display_data:
-    df = pd.DataFrame(display_data)
+if not df.empty:
     st.markdown("#### 📊 總量統計")
-    summary = df.groupby("番號")["總重"].sum().reset_index()
-    summary["噸數"] = summary["總重"] / 1000; summary["金額"] = summary["噸數"] * unit_price
-    st.dataframe(summary.style.format({"總重": "{:.2f}", "噸數": "{:.3f}", "金額": "${:,.0f}"}), use_container_width=True)
+    with timer.stage("summary"):
+        summary = report_cache.summary()
+        summary["噸數"] = summary["總重"] / 1000; summary["金額"] = summary["噸數"] * unit_price
+        st.dataframe(summary.style.format({"總重": "{:.2f}", "噸數": "{:.3f}", "金額": "${:,.0f}"}), use_container_width=True)
+    timer.count("summary", rows=len(summary))
+
+    with st.expander("🔀 情境比較 (定尺 × 拆料 × 材料強度)"):
+        st.caption("一次計算所有定尺、拆料開/關與 S7-01 表列強度組合；查表而來的搭接長度改用各強度表值，手動輸入者維持原值。")
+        def sweep_key():
+            # 依原始資料內容雜湊判斷結果是否過期 (明細未變時沿用上次的雜湊)
+            cached = st.session_state.get('_items_digest')
+            if cached is None or cached[0] is not df:
+                cached = st.session_state['_items_digest'] = (df, report_digest(st.session_state['raw_data_list'].to_frame()))
+            return (cached[1], fc, fy, lap_interp, unit_price)
+        if st.button("▶️ 執行情境比較"):
+            with timer.stage("sweep", items=len(st.session_state['raw_data_list'])):
+                st.session_state['sweep_result'] = (sweep_key(), sweep(items_to_columns(st.session_state['raw_data_list']), fc, fy, lap_interp, unit_price=unit_price))
+        if 'sweep_result' in st.session_state:
+            sweep_at, sweep_df = st.session_state['sweep_result']
+            if sweep_at != sweep_key(): st.warning("資料或參數已變更，請重新執行情境比較。")
+            current = ((sweep_df["f_y"] == fy) & (sweep_df["f'c"] == fc) & (sweep_df["定尺(m)"] == stock_len // 100)
+                       & (sweep_df["自動拆料"] == auto_split)).to_numpy()
+            st.dataframe(sweep_df.style.apply(lambda r: ["background-color: #fff3cd"] * len(r) if current[r.name] else [""] * len(r), axis=1)
+                         .format({"總重(kg)": "{:,.2f}", "噸數": "{:.3f}", "金額": "${:,.0f}"}), use_container_width=True, hide_index=True)
     
+    st.markdown("#### ✂️ 定尺排料計畫")
+    cut_patterns = pd.DataFrame()
+    if cut_stocks:
+        with timer.stage("cutting", rows=len(df)):
+            # 明細、可用定尺與最佳化選項皆未變時沿用上次的排料結果
+            cut_key = (tuple(cut_stocks), cut_improve)
+            cached_plan = st.session_state.get('_cutting_plan')
+            if cached_plan is None or cached_plan[0] is not df or cached_plan[1] != cut_key:
+                cached_plan = st.session_state['_cutting_plan'] = (df, cut_key, cutting_plan(df, [s * 100 for s in cut_stocks], cut_improve))
+            cut_patterns, cut_summary = cached_plan[2]
+            st.dataframe(cut_summary.style.format({"需求長(cm)": "{:,.1f}", "定尺總長(cm)": "{:,.1f}", "損耗率(%)": "{:.2f}"}), use_container_width=True)
+            with st.expander("裁切組合明細"):
+                st.dataframe(cut_patterns, use_container_width=True, hide_index=True)
+    else: st.info("請於側邊欄選擇排料可用定尺。")
+
     st.markdown("#### 📄 加工裁切明細")
-    cols = st.columns([0.5, 1, 1.5, 1, 1, 1.5, 1, 1.5, 3, 0.5])
-    headers = ["#","番號","形狀","單長(cm)","支數","總長(cm)","單位重","總重","備註",""]
-    for c, h in zip(cols, headers): c.markdown(f"**{h}**")
-    
-    for i, row in df.iterrows():
-        cols = st.columns([0.5, 1, 1.5, 1, 1, 1.5, 1, 1.5, 3, 0.5])
-        cols[0].write(f"{i+1}"); cols[1].write(row['番號']); cols[2].write(row['形狀'])
-        len_str = f"<span style='color:red; font-weight:bold'>{row['單支長']}</span>" if row['單支長'] > stock_len else f"{row['單支長']}"
-        cols[3].markdown(len_str, unsafe_allow_html=True)
-        cols[4].write(f"{row['支數']}"); cols[5].write(f"{row['總長(cm)']}")
-        cols[6].write(f"{row['單位重']}"); cols[7].write(f"{row['總重']}"); cols[8].write(row['備註'])
-        if cols[9].button("🗑️", key=f"del_{i}"): delete_item(row['raw_idx']); st.rerun()
+    cut_view = st.checkbox("🧮 合併相同番號與長度 (裁切清單)", key="cut_view", help="依 (番號, 單支長) 合併支數與重量，列出來源項次與備註")
+    if cut_view:
+        with timer.stage("cut_list", rows=len(df)):
+            # 明細未變時沿用上次的合併結果
+            cached_cut = st.session_state.get('_cut_list')
+            if cached_cut is None or cached_cut[0] is not df: cached_cut = st.session_state['_cut_list'] = (df, cut_list(df))
+            st.caption(f"{len(df)} 列加工明細 → {len(cached_cut[1])} 種裁切長度")
+            st.dataframe(cached_cut[1].style.format({"單支長": "{:.1f}", "總長(cm)": "{:,.1f}", "單位重": "{:.3f}", "總重": "{:,.2f}"}),
+                         use_container_width=True, hide_index=True)
+        timer.count("cut_list", groups=len(cached_cut[1]))
+    else:
+        # 單一虛擬化表格 + 分頁：每次只渲染一頁，樣式也只套用在該頁
+        with timer.stage("detail_grid", rows=len(df)):
+            c_size, c_page, c_info = st.columns([1, 1, 3])
+            with c_size: page_size = st.selectbox("每頁筆數", [50, 100, 200, 500], index=1)
+            n_pages = max(1, math.ceil(len(df) / page_size))
+            with c_page: page = st.number_input("頁次", min_value=1, max_value=n_pages, value=1, step=1)
+            with c_info: st.caption(f"共 {len(df)} 列 / {n_pages} 頁，勾選列後可批次刪除 (刪除整筆原始項目)")
+            start = (page - 1) * page_size
+            page_df = df.iloc[start:start + page_size]
+            page_df = page_df.set_axis(range(start + 1, start + 1 + len(page_df))).rename_axis("#")
+            over_stock = lambda v: "color: red; font-weight: bold" if v > stock_len else ""
+            grid = st.dataframe(
+                page_df.style.map(over_stock, subset=["單支長"]).format({"單支長": "{:.1f}", "總長(cm)": "{:.1f}", "單位重": "{:.3f}", "總重": "{:.2f}"}),
+                column_order=["番號", "形狀", "單支長", "支數", "總長(cm)", "單位重", "總重", "備註"],
+                use_container_width=True, on_select="rerun", selection_mode="multi-row", key=f"detail_grid_{page}_{page_size}_{st.session_state.get('grid_nonce', 0)}")
+            selected = [i for i in grid.selection.rows if i < len(page_df)]
+            if st.button(f"🗑️ 刪除勾選項目 ({len(selected)})", disabled=not selected):
+                delete_items(page_df.iloc[selected]["raw_idx"].tolist()); st.rerun()
+        timer.count("detail_grid", page_rows=len(page_df))
 
     st.markdown("---")
     col_del, col_dl = st.columns([1, 4])
     with col_del:
         if st.button("🗑️ 清空全部", type="secondary"): clear_all_data(); st.rerun()
     with col_dl:
-        def export_excel():
-            wb = Workbook(); ws = wb.active; ws.title = "撿料單"
-            font_header = Font(name='微軟正黑體', bold=True, size=12)
-            font_body = Font(name='微軟正黑體', size=11)
-            border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-            ws.merge_cells('A1:D1'); ws['A1'] = f"建案名稱: {project_name}"; ws['A1'].font = font_header
-            ws.merge_cells('E1:H1'); ws['E1'] = f"聯絡人: {contact_person}"; ws['E1'].font = font_header
-            ws.merge_cells('I1:L1'); ws['I1'] = f"結構部位: {structure_part}"; ws['I1'].font = font_header
-            headers = ["編號","番號","形狀","單支長\n(cm)","支數","總長\n(cm)","單位重","總重\n(kg)","備註"]
-            for i, t in enumerate(headers, 1):
-                c = ws.cell(row=2, column=i, value=t); c.font = font_header; c.border = border; c.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-            for r, row in df.iterrows():
-                d = [r+1, row['番號'], row['形狀'], row['單支長'], row['支數'], row['總長(cm)'], row['單位重'], row['總重'], row['備註']]
-                for i, v in enumerate(d, 1): c = ws.cell(row=r+3, column=i, value=v); c.font = font_body; c.border = border; c.alignment = Alignment(horizontal='center', vertical='center')
-            return wb
-        out = BytesIO(); wb = export_excel(); wb.save(out)
-        st.download_button("📥 下載加工 Excel", out.getvalue(), f"{project_name}_下料單.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", type="primary")
+        c_part, c_cut = st.columns(2)
+        with c_part: by_part = st.checkbox("含部位統計工作表", value=True)
+        with c_cut: consolidated = st.checkbox("含合併裁切清單工作表", value=False)
+        # 僅在按下下載時產生 (依內容雜湊快取)，一般操作不重建工作簿
+        build_xlsx = timer.wrap("export", lambda: cached_export_excel(df, project_name, contact_person, structure_part, unit_price, cut_patterns, by_part, consolidated),
+                                diag_state, rows=len(df))
+        st.download_button("📥 下載加工 Excel", build_xlsx, f"{project_name}_下料單.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", type="primary")
 
 else: st.info("目前無資料，請從上方新增。")
+
+# === 11. 效能診斷 ===
+run = timer.finish(items=len(st.session_state['raw_data_list']))
+with st.sidebar, st.expander("🩺 效能診斷"):
+    st.checkbox("記錄每次重新整理的階段耗時", key="diag")
+    st.checkbox(f"同時寫入 {TIMING_LOG} (JSON lines)", key="diag_log", disabled=not st.session_state['diag'])
+    if run:
+        st.caption(f"本次總耗時 {run['total_ms']:.1f} ms，{run['items']} 筆原始項目 (各階段可能巢狀，加總不等於總耗時)")
+        st.dataframe(pd.DataFrame(run['stages']), use_container_width=True, hide_index=True)
+        if 'export' in diag_state:
+            st.caption(f"上次 Excel 產生: {diag_state['export']['ms']:.1f} ms ({diag_state['export']['rows']} 列)")
+    # 記憶體統計需逐筆建立 dict 比較 (10 萬筆約 1 秒)，按下時才計算
+    if st.button("計算記憶體用量", disabled=not st.session_state['raw_data_list']):
+        n = len(st.session_state['raw_data_list'])
+        per_dict, per_table = memory_report(st.session_state['raw_data_list'])
+        cache_mb = st.session_state['report_cache'].nbytes() / 2**20
+        st.caption(f"原始資料：每筆 {per_table:.0f} bytes (list of dict 約 {per_dict:.0f} bytes)，共 {per_table * n / 2**20:.1f} MB；"
+                   f"報表快取 {cache_mb:.1f} MB")
@@ -0,0 +1,6 @@
+# 鋼筋撿料計算核心 (可獨立於 Streamlit 匯入)
+from rebar.core import (REBAR_DB, S7_DATA, lookup_data, split_rebar, hook_lengths, hook_length, bar_length,
+                        slab_bar_count, stirrup_length, stirrup_count, spiral_turn, spiral_length, spiral_lap,
+                        make_item)
+from rebar.lap_table import lap_length, lap_lengths
+from rebar.report import REPORT_COLUMNS, build_report, items_to_columns, ReportCache
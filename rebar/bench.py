@@ -0,0 +1,139 @@
+# === 效能基準測試 ===
+# 以固定亂數種子產生合成專案 (主筋/版牆筋/箍筋/螺旋箍筋)，逐一量測各計算階段的
+# 處理量與尖峰記憶體，用來在熱點路徑退步時及早發現。
+# 用法: python -m rebar.bench                    (1k/10k/100k 全部階段)
+#       python -m rebar.bench -n 10000 --stage report --stage cutting --json bench.json
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from rebar.cli import parse_member
+from rebar.core import REBAR_DB, lookup_data, split_rebar, stirrup_count, spiral_length
+from rebar.lap_table import lap_lengths
+from rebar.report import build_report, items_to_columns, cut_list
+
+SIZES = list(REBAR_DB)
+DEFAULT_COUNTS = (1_000, 10_000, 100_000)
+
+
+def synthetic_members(n, seed=0):
+    """產生 n 筆構件輸入參數 (dict)，比例約為 主筋 40%、版牆筋 30%、箍筋 25%、螺旋箍筋 5%。"""
+    r = random.Random(seed)
+    out = []
+    for _ in range(n):
+        u = r.random()
+        size = r.choice(SIZES)
+        if u < 0.40:
+            out.append({"type": "main", "size": size, "L": float(r.randrange(200, 3600, 5)), "count": r.randrange(2, 13),
+                        "hL": r.choice(("平切", "90度", "180度")), "hR": r.choice(("平切", "90度")), "top": r.random() < 0.3})
+        elif u < 0.70:
+            out.append({"type": "slab", "size": r.choice(SIZES[:4]), "L": float(r.randrange(300, 2400, 5)),
+                        "range_len": float(r.randrange(200, 1200, 10)), "spacing": r.choice((10.0, 12.5, 15.0, 20.0)),
+                        "hL": "90度", "hR": "90度", "top": r.random() < 0.5})
+        elif u < 0.95:
+            out.append({"type": "stirrup", "size": r.choice(SIZES[:3]), "W": float(r.randrange(30, 100, 5)),
+                        "H": float(r.randrange(40, 150, 5)), "Span": float(r.randrange(300, 1200, 10)),
+                        "sE": r.choice((0.0, 10.0, 12.0)), "sC": r.choice((15.0, 20.0))})
+        else:
+            out.append({"type": "spiral", "size": r.choice(SIZES[:3]), "D": float(r.randrange(60, 200, 10)),
+                        "L": float(r.randrange(600, 3600, 50)), "P": r.choice((10.0, 15.0)), "count": r.randrange(1, 4)})
+    return out
+
+
+def members_to_items(members, fc=280, fy=4200, cover=4.0):
+    """以 CLI 的 parse_member 將構件參數轉為 raw_data_list 原始資料 (與介面「加入清單」相同)。"""
+    items = []
+    for m in members:
+        row = {k: ("1" if v is True else "" if v is False else str(v)) for k, v in m.items()}
+        row.setdefault("note", m["type"])
+        items.append(parse_member(row, fc, fy, cover))
+    return items
+
+
+def _stages(members, stock_len=1200):
+    # 每個階段回傳 (名稱, 函式, 處理單位數)；函式的輸入於量測前準備好
+    items = members_to_items(members)
+    stirrups = [m for m in members if m["type"] == "stirrup"]
+    spirals = [m for m in members if m["type"] == "spiral"]
+    df = build_report(items, stock_len, True)
+
+    def stage_cutting():
+        from rebar.cutting import cutting_plan
+        cutting_plan(df, [stock_len], True)
+
+    def stage_sweep():
+        from rebar.sweep import sweep
+        sweep(items_to_columns(items), 280, 4200)
+
+    def stage_export():
+        from rebar.export import export_excel
+        export_excel(df, "bench", "bench", "bench", 23000)
+
+    return [
+        ("lookup_data", lambda: [lookup_data(280, 4200, it["size_key"], 'tension') for it in items], len(items)),
+        ("lap_lengths", lambda: lap_lengths(280, 4200, [it["size_key"] for it in items], 'tension'), len(items)),
+        ("split_rebar", lambda: [split_rebar(it["base_len"], stock_len, it["lap_len"]) for it in items], len(items)),
+        ("stirrup_count", lambda: [stirrup_count(m["Span"], m["H"], m["sE"], m["sC"]) for m in stirrups], len(stirrups)),
+        ("spiral_length", lambda: [spiral_length(m["D"], m["L"], m["P"], 4.0) for m in spirals], len(spirals)),
+        ("items", lambda: members_to_items(members), len(members)),
+        ("report", lambda: build_report(items_to_columns(items), stock_len, True), len(items)),
+        ("report_merged", lambda: build_report(items_to_columns(items), stock_len, False), len(items)),
+        ("cut_list", lambda: cut_list(df), len(df)),
+        ("cutting", stage_cutting, len(df)),
+        ("export", stage_export, len(df)),
+        ("sweep", stage_sweep, len(items)),
+    ]
+
+
+STAGE_NAMES = [name for name, _, _ in _stages([])]
+
+
+def _measure(fn, memory):
+    t = time.perf_counter(); fn(); elapsed = time.perf_counter() - t
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            fn(); peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return elapsed, peak
+
+
+def run(counts=DEFAULT_COUNTS, stages=None, seed=0, memory=True, stock_len=1200):
+    """執行基準測試，逐一產生各 (項目數, 階段) 的結果 dict。"""
+    for n in counts:
+        members = synthetic_members(n, seed)
+        for name, fn, units in _stages(members, stock_len):
+            if stages and name not in stages: continue
+            elapsed, peak = _measure(fn, memory)
+            yield {"items": n, "stage": name, "units": units, "seconds": round(elapsed, 4),
+                   "units_per_s": round(units / elapsed) if elapsed > 0 else None,
+                   "peak_mb": round(peak / 2**20, 2) if peak is not None else None}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m rebar.bench", description="鋼筋撿料計算核心效能基準")
+    ap.add_argument("-n", "--items", type=int, action="append", help="專案項目數 (可重複，預設 1000/10000/100000)")
+    ap.add_argument("--stage", action="append", choices=STAGE_NAMES, help="只量測指定階段 (可重複)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--no-memory", action="store_true", help="不量測尖峰記憶體 (tracemalloc 會額外執行一次)")
+    ap.add_argument("--json", help="另存結果為 JSON lines")
+    args = ap.parse_args(argv)
+
+    print(f"{'items':>8} {'stage':<14} {'units':>9} {'seconds':>9} {'units/s':>12} {'peak MB':>9}")
+    rows = []
+    for r in run(args.items or DEFAULT_COUNTS, args.stage, args.seed, not args.no_memory):
+        rows.append(r)
+        peak = f"{r['peak_mb']:.2f}" if r['peak_mb'] is not None else "-"
+        rate = f"{r['units_per_s']:,}" if r['units_per_s'] is not None else "-"
+        print(f"{r['items']:>8} {r['stage']:<14} {r['units']:>9} {r['seconds']:>9.4f} {rate:>12} {peak:>9}", flush=True)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            for r in rows: f.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# === 批次撿料 CLI：串流讀取 CSV/Excel 構件清單，輸出加工明細與番號統計 ===
+# 用法: python -m rebar.cli members.csv -o 加工明細.csv -s 統計.csv --fc 280 --fy 4200
+#
+# 輸入欄位 (表頭，空白欄位可省略)：
+#   type      main(主筋) / slab(版牆筋) / stirrup(箍筋) / spiral(螺旋箍筋)
+#             亦可填中文或別名 (版/牆、梁/柱/beam/column、樁/pile)，見 core.MEMBER_TYPES
+#   size      番號，如 #5
+#   L         跨距/淨長；螺旋箍筋為樁長
+#   count     支數 (版牆筋未填時依 range_len/spacing 計算；箍筋未填時依 Span 分區計算)
+#   hL, hR    左右彎鉤：平切/90度/180度 (亦可填 0/90/180)
+#   range_len, spacing       版牆筋佈筋範圍與間距
+#   W, H, Span, sE, sC       箍筋寬深、淨跨距、加密區/一般區間距
+#   D, P      螺旋箍筋直徑與間距
+#   lap       搭接長度 (未填時依 S7-01 查表；螺旋箍筋為 1.5 圈)
+#   cover, top, column, note 保護層、頂層筋、柱/受壓構件、備註
+# 全程以產生器逐列處理並分批展開，記憶體用量不隨輸入列數增加。
+import argparse
+import csv
+import sys
+from itertools import islice
+from pathlib import Path
+
+from openpyxl import Workbook, load_workbook
+
+from rebar.core import (REBAR_DB, bar_length, slab_bar_count, stirrup_length, stirrup_count, spiral_length,
+                        spiral_lap, make_item, member_type, lap_errors, raise_errors, spiral_errors, stirrup_errors)
+from rebar.lap_table import lap_length
+from rebar.report import REPORT_COLUMNS, build_report, items_to_columns
+
+CHUNK_SIZE = 5000
+HOOK_ALIASES = {"": "平切", "0": "平切", "平切": "平切", "90": "90度", "90度": "90度", "180": "180度", "180度": "180度"}
+TRUE_VALUES = {"1", "y", "yes", "true", "是", "v"}
+NAN = float("nan")
+
+
+def read_rows(path):
+    """逐列讀取 CSV 或 XLSX (read-only 模式)，產生 (列號, dict)。"""
+    path = Path(path)
+    if path.suffix.lower() in (".xlsx", ".xlsm"):
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            header = [str(h).strip() if h is not None else "" for h in next(rows, ())]
+            for line_no, values in enumerate(rows, 2):
+                yield line_no, {h: ("" if v is None else str(v).strip()) for h, v in zip(header, values)}
+        finally:
+            wb.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for line_no, row in enumerate(csv.DictReader(f), 2):
+                yield line_no, {k.strip(): (v or "").strip() for k, v in row.items() if k}
+
+
+def _num(row, key, default=None):
+    v = row.get(key, "")
+    if v == "":
+        if default is None: raise ValueError(f"缺少欄位 {key}")
+        return default
+    return float(v)
+
+
+def parse_member(row, fc, fy, cover, interpolate=False, stock_len=None):
+    """將一列構件資料轉為 raw_data_list 原始資料 (與介面「加入清單」相同邏輯)。
+
+    指定 ``stock_len`` 時另檢查需拆料的主筋/螺旋箍筋搭接長度小於定尺。
+    """
+    kind = member_type(row.get("type", ""))
+    size_key = row.get("size", "")
+    if size_key not in REBAR_DB: raise ValueError(f"未知番號 {size_key!r}")
+    cover = _num(row, "cover", cover)
+    note = row.get("note", "")
+    count = _num(row, "count", 0)
+
+    if kind in ("main", "slab"):
+        raise_errors([(count < 0, "支數不可為負")])
+        L = _num(row, "L")
+        base_len = bar_length(L, cover, size_key, HOOK_ALIASES[row.get("hL", "")], HOOK_ALIASES[row.get("hR", "")])
+        if kind == "slab" and count <= 0:
+            count = slab_bar_count(_num(row, "range_len", 0), _num(row, "spacing", 15.0))
+        if row.get("lap", "") != "":
+            lap = _num(row, "lap")
+        elif row.get("column", "").lower() in TRUE_VALUES:
+            lap = lap_length(fc, fy, size_key, 'compression', interpolate=interpolate)[0]
+        else:
+            lap = lap_length(fc, fy, size_key, 'tension', row.get("top", "").lower() in TRUE_VALUES, interpolate)[0]
+        if stock_len is not None: raise_errors(lap_errors(base_len, lap, stock_len))
+        return make_item("main", size_key, f"L={L}", base_len, lap, int(count) or 1, note)
+
+    if kind == "spiral":
+        D = _num(row, "D", NAN); L = _num(row, "L", NAN); P = _num(row, "P", 15.0)
+        raise_errors(spiral_errors(D, L, P, cover, count))
+        base_len = spiral_length(D, L, P, cover); lap = _num(row, "lap", spiral_lap(D, P, cover))
+        if stock_len is not None: raise_errors(lap_errors(base_len, lap, stock_len))
+        return make_item("main", size_key, f"◎ D={D}", base_len, lap, int(count) or 1, note)
+
+    W = _num(row, "W", NAN); H = _num(row, "H", NAN)
+    span = _num(row, "Span", NAN); sE = _num(row, "sE", 10.0); sC = _num(row, "sC", 15.0)
+    raise_errors(stirrup_errors(W, H, cover, span, sE, sC, count))
+    if count <= 0: count = stirrup_count(span, H, sE, sC)
+    return make_item("stirrup", size_key, f"口 {W}x{H}", stirrup_length(W, H, cover, size_key), 0, int(count), note)
+
+
+def iter_items(rows, fc, fy, cover, errors, interpolate=False, stock_len=None):
+    for line_no, row in rows:
+        if not any(row.values()): continue
+        try:
+            yield parse_member(row, fc, fy, cover, interpolate, stock_len)
+        except (ValueError, KeyError, ZeroDivisionError) as e:
+            errors.append((line_no, str(e)))
+
+
+def iter_report_chunks(items, stock_len, auto_split, chunk_size=CHUNK_SIZE):
+    """每次取 chunk_size 筆原始資料以欄式引擎展開，raw_idx 為輸入順序的全域編號。"""
+    offset = 0
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk: return
+        df = build_report(items_to_columns(chunk), stock_len, auto_split)
+        df["raw_idx"] += offset
+        offset += len(chunk)
+        yield df
+
+
+class _TableWriter:
+    # 依副檔名寫出 CSV 或 write-only XLSX，皆為逐列串流
+    def __init__(self, path, header):
+        self.path = Path(path)
+        self.xlsx = self.path.suffix.lower() == ".xlsx"
+        if self.xlsx:
+            self.wb = Workbook(write_only=True); self.ws = self.wb.create_sheet()
+            self.ws.append(header)
+        else:
+            self.f = open(self.path, "w", newline="", encoding="utf-8-sig")
+            self.w = csv.writer(self.f); self.w.writerow(header)
+
+    def write_rows(self, rows):
+        if self.xlsx:
+            for r in rows: self.ws.append(r)
+        else:
+            self.w.writerows(rows)
+
+    def write_frame(self, df):
+        if self.xlsx: self.write_rows(df.itertuples(index=False, name=None))
+        else: df.to_csv(self.f, header=False, index=False, lineterminator="\r\n")
+
+    def close(self):
+        if self.xlsx: self.wb.save(self.path)
+        else: self.f.close()
+
+
+def run(input_path, schedule_path, summary_path=None, fc=280, fy=4200, stock_len=1200,
+        auto_split=True, cover=4.0, unit_price=23000, interpolate=False):
+    """串流處理整份構件清單，回傳 (原始項目數, 明細列數, 錯誤列表)。"""
+    errors = []
+    totals = {}
+    n_items = 0; n_rows = 0
+    writer = _TableWriter(schedule_path, ["編號"] + REPORT_COLUMNS[1:])
+    try:
+        items = iter_items(read_rows(input_path), fc, fy, cover, errors, interpolate, stock_len)
+        for df in iter_report_chunks(items, stock_len, auto_split):
+            n_items = int(df["raw_idx"].iloc[-1]) + 1
+            df["raw_idx"] += 1
+            writer.write_frame(df)
+            n_rows += len(df)
+            for size_key, w in df.groupby("番號", sort=False)["總重"].sum().items():
+                totals[size_key] = totals.get(size_key, 0.0) + w
+    finally:
+        writer.close()
+
+    if summary_path:
+        summary = _TableWriter(summary_path, ["番號", "總重", "噸數", "金額"])
+        order = {k: i for i, k in enumerate(REBAR_DB)}
+        summary.write_rows([k, round(w, 2), round(w / 1000, 3), round(w / 1000 * unit_price)]
+                           for k, w in sorted(totals.items(), key=lambda kv: order[kv[0]]))
+        summary.close()
+    return n_items, n_rows, errors
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m rebar.cli", description="鋼筋撿料批次計算 (CSV/XLSX 構件清單)")
+    ap.add_argument("input", help="構件清單 CSV 或 XLSX")
+    ap.add_argument("-o", "--schedule", required=True, help="加工明細輸出 (.csv 或 .xlsx)")
+    ap.add_argument("-s", "--summary", help="番號統計輸出 (.csv 或 .xlsx)")
+    ap.add_argument("--fc", type=float, default=280, help="混凝土 f'c (預設 280)")
+    ap.add_argument("--fy", type=float, default=4200, help="鋼筋 f_y (預設 4200)")
+    ap.add_argument("--interpolate", action="store_true", help="非表列 f'c 於 S7-01 表列值間線性內插")
+    ap.add_argument("--stock-len", type=float, default=12, help="鋼筋定尺 m (預設 12)")
+    ap.add_argument("--no-split", action="store_true", help="關閉自動拆料 (合併顯示搭接)")
+    ap.add_argument("--cover", type=float, default=4.0, help="預設保護層 cm (預設 4.0)")
+    ap.add_argument("--unit-price", type=float, default=23000, help="鋼筋單價 元/噸 (預設 23000)")
+    args = ap.parse_args(argv)
+
+    # 整數強度才能對應 S7-01 表格欄位
+    fc = int(args.fc) if float(args.fc).is_integer() else args.fc
+    fy = int(args.fy) if float(args.fy).is_integer() else args.fy
+    n_items, n_rows, errors = run(args.input, args.schedule, args.summary, fc, fy, round(args.stock_len * 100),
+                                  not args.no_split, args.cover, args.unit_price, args.interpolate)
+    for line_no, msg in errors:
+        print(f"第 {line_no} 列錯誤: {msg}", file=sys.stderr)
+    print(f"完成：{n_items} 筆構件 → {n_rows} 列加工明細，{len(errors)} 列錯誤")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+# === 鋼筋撿料計算核心：材料資料、查表與長度/支數公式 ===
+# 不依賴 Streamlit，供 app.py、批次 CLI 與其他工具共用。
+import math
+
+import numpy as np
+
+# === 鋼筋基本資料 (CNS 560) ===
+REBAR_DB = {
+    '#3': {'dia': 0.953, 'weight': 0.560, 'db': 0.953},
+    '#4': {'dia': 1.270, 'weight': 0.994, 'db': 1.27},
+    '#5': {'dia': 1.590, 'weight': 1.560, 'db': 1.59},
+    '#6': {'dia': 1.910, 'weight': 2.250, 'db': 1.91},
+    '#7': {'dia': 2.220, 'weight': 3.040, 'db': 2.22},
+    '#8': {'dia': 2.540, 'weight': 3.980, 'db': 2.54},
+    '#9': {'dia': 2.870, 'weight': 5.060, 'db': 2.87},
+    '#10': {'dia': 3.220, 'weight': 6.370, 'db': 3.22},
+    '#11': {'dia': 3.580, 'weight': 7.907, 'db': 3.58}
+}
+
+# === S7-01 標準圖數位化資料庫 ===
+S7_DATA = {
+    4200: {
+        210: { 'tension_B': {'#3':55, '#4':73, '#5':91, '#6':110, '#7':158, '#8':181, '#9':205, '#10':229, '#11':255}, 'tension_Top': {'#3':71, '#4':95, '#5':118, '#6':142, '#7':206, '#8':235, '#9':266, '#10':298, '#11':331}, 'compression': {'#3':30, '#4':39, '#5':49, '#6':59, '#7':69, '#8':78, '#9':88, '#10':99, '#11':110}, 'develop': {'#3':42, '#4':56, '#5':70, '#6':84, '#7':122, '#8':139, '#9':157, '#10':177, '#11':196} },
+        245: { 'tension_B': {'#3':51, '#4':68, '#5':85, '#6':101, '#7':147, '#8':168, '#9':189, '#10':212, '#11':236}, 'tension_Top': {'#3':66, '#4':88, '#5':110, '#6':132, '#7':190, '#8':218, '#9':246, '#10':276, '#11':307}, 'compression': {'#3':30, '#4':39, '#5':49, '#6':59, '#7':69, '#8':78, '#9':88, '#10':99, '#11':110}, 'develop': {'#3':39, '#4':52, '#5':65, '#6':78, '#7':113, '#8':129, '#9':146, '#10':164, '#11':182} },
+        280: { 'tension_B': {'#3':48, '#4':63, '#5':79, '#6':95, '#7':137, '#8':157, '#9':177, '#10':199, '#11':221}, 'tension_Top': {'#3':62, '#4':82, '#5':103, '#6':123, '#7':178, '#8':204, '#9':230, '#10':258, '#11':287}, 'compression': {'#3':30, '#4':39, '#5':49, '#6':59, '#7':69, '#8':78, '#9':88, '#10':99, '#11':110}, 'develop': {'#3':37, '#4':49, '#5':61, '#6':73, '#7':106, '#8':121, '#9':136, '#10':153, '#11':170} },
+        350: { 'tension_B': {'#3':43, '#4':57, '#5':71, '#6':85, '#7':123, '#8':140, '#9':159, '#10':178, '#11':198}, 'tension_Top': {'#3':55, '#4':74, '#5':92, '#6':110, '#7':159, '#8':182, '#9':206, '#10':231, '#11':257}, 'compression': {'#3':30, '#4':39, '#5':49, '#6':59, '#7':69, '#8':78, '#9':88, '#10':99, '#11':110}, 'develop': {'#3':33, '#4':44, '#5':55, '#6':65, '#7':95, '#8':108, '#9':122, '#10':137, '#11':152} }
+    },
+    2800: {
+        210: { 'tension_B': {'#3':37, '#4':49, '#5':61, '#6':73, '#7':106, '#8':121, '#9':137, '#10':153, '#11':170}, 'tension_Top': {'#3':48, '#4':63, '#5':79, '#6':95, '#7':137, '#8':157, '#9':177, '#10':199, '#11':221}, 'compression': {'#3':30, '#4':30, '#5':33, '#6':40, '#7':46, '#8':52, '#9':59, '#10':66, '#11':74}, 'develop': {'#3':30, '#4':38, '#5':47, '#6':56, '#7':81, '#8':93, '#9':105, '#10':118, '#11':131} },
+        280: { 'tension_B': {'#3':32, '#4':42, '#5':53, '#6':63, '#7':92, '#8':105, '#9':118, '#10':133, '#11':147}, 'tension_Top': {'#3':41, '#4':55, '#5':69, '#6':82, '#7':119, '#8':136, '#9':154, '#10':172, '#11':192}, 'compression': {'#3':30, '#4':30, '#5':33, '#6':40, '#7':46, '#8':52, '#9':59, '#10':66, '#11':74}, 'develop': {'#3':30, '#4':33, '#5':41, '#6':49, '#7':71, '#8':81, '#9':91, '#10':102, '#11':114} }
+    }
+}
+
+# === 核心查表功能 ===
+def lookup_data(fc, fy, size, type_mode, is_top=False):
+    val = 0; desc = "請手動輸入"
+    try:
+        fy_table = S7_DATA.get(fy)
+        if fy_table:
+            fc_table = fy_table.get(fc)
+            if fc_table:
+                key = ""
+                if type_mode == 'compression': key = 'compression'
+                elif type_mode == 'develop': key = 'develop'
+                else: key = 'tension_Top' if is_top else 'tension_B'
+                val = fc_table[key].get(size, 0)
+                if val > 0: desc = "標準圖查表"
+    except: pass
+    if val == 0:
+        db = REBAR_DB[size]['db']
+        desc = "公式估算"
+        if type_mode == 'compression': val = max(math.ceil(0.043 * fy * db), 20)
+        else:
+            factor = 46 * (fy / 4200) * math.sqrt(280 / fc)
+            if is_top: factor *= 1.3
+            val = math.ceil(factor * db * 1.3)
+    return val, desc
+
+# === 自動拆料演算法 ===
+def split_rebar(req_len, stock_len, lap_len):
+    if req_len <= stock_len:
+        return [req_len]
+    pieces = []
+    rem = req_len
+    while rem > stock_len:
+        pieces.append(stock_len)
+        rem -= (stock_len - lap_len)
+    pieces.append(rem)
+    return pieces
+
+# === 彎鉤、長度與支數公式 ===
+HOOK_TYPES = ("平切", "90度", "180度")
+
+
+def hook_lengths(size):
+    db = REBAR_DB[size]['db']
+    return math.ceil(max(12*db, 15)), math.ceil(max(4*db, 6.5))
+
+
+def hook_length(size, hook):
+    h90, h180 = hook_lengths(size)
+    return {"平切": 0, "90度": h90, "180度": h180}[hook]
+
+
+def bar_length(L, cover, size, hook_l="平切", hook_r="平切"):
+    # 主筋/版牆筋：淨長 + 左右彎鉤
+    if L <= 0: raise ValueError("長度需大於0")
+    return L - (2 * cover) + hook_length(size, hook_l) + hook_length(size, hook_r)
+
+
+def slab_bar_count(range_len, spacing):
+    return math.ceil(range_len / spacing) + 1 if range_len > 0 else 1
+
+
+def stirrup_length(W, H, cover, size):
+    cw = W - 2*cover; ch = H - 2*cover
+    return (cw+ch)*2 + max(24*REBAR_DB[size]['db'], 20)
+
+
+def stirrup_count(span, H, sE, sC):
+    # 智慧分區：梁端 2H 加密區 @sE，中段 @sC；加密區重疊時全加密
+    if sE <= 0: return math.ceil(span / sC) + 1
+    zE = 2*H
+    if zE*2 >= span: return math.ceil(span/sE) + 1
+    return math.ceil(zE/sE)*2 + math.ceil((span - 2*zE)/sC) + 1
+
+
+def spiral_turn(D, P, cover):
+    # 螺旋箍筋每圈長度 (核心周長與間距的斜邊)
+    circ = math.pi * (D - 2*cover)
+    return math.sqrt(circ**2 + P**2), circ
+
+
+def spiral_length(D, L, P, cover):
+    if D <= 0 or P <= 0: raise ValueError("請輸入正確尺寸")
+    one_turn, circ = spiral_turn(D, P, cover)
+    return (one_turn * (L / P)) + (3.0 * circ)
+
+
+def spiral_lap(D, P, cover):
+    # 建議搭接 1.5 圈 (四捨五入至 0.1 cm)
+    if D <= 0 or P <= 0: return 0.0
+    return float(f"{1.5 * spiral_turn(D, P, cover)[0]:.1f}")
+
+
+def make_item(mode, size_key, shape_str, base_len, lap_len, count, note):
+    """建立一筆 raw_data_list 原始資料。"""
+    return {
+        "mode": mode, "size_key": size_key, "shape_str": shape_str,
+        "base_len": base_len, "lap_len": lap_len,
+        "count": count, "uw": REBAR_DB[size_key]['weight'], "note": note
+    }
+
+
+# === 構件類型與輸入檢查 (CLI、批次構件表共用) ===
+# 類型名稱 -> 標準類型；梁/柱 (含 beam/column) 指箍筋，樁 (pile) 指螺旋箍筋
+MEMBER_TYPES = {
+    "main": "main", "主筋": "main",
+    "slab": "slab", "版": "slab", "牆": "slab", "版牆": "slab",
+    "stirrup": "stirrup", "箍筋": "stirrup", "梁": "stirrup", "柱": "stirrup", "beam": "stirrup", "column": "stirrup",
+    "spiral": "spiral", "螺旋": "spiral", "樁": "spiral", "pile": "spiral",
+}
+
+
+def member_type(kind):
+    """將構件類型名稱 (不分大小寫、前後空白) 轉為 main/slab/stirrup/spiral。"""
+    t = MEMBER_TYPES.get(str(kind).strip().lower())
+    if t is None: raise ValueError(f"未知構件類型 {kind!r}")
+    return t
+
+
+def stirrup_errors(W, H, cover, span=np.nan, sE=10.0, sC=15.0, count=np.nan):
+    """箍筋輸入檢查，可為純量或陣列；回傳 [(錯誤遮罩, 訊息), ...]。count 未填 (<=0) 時依 Span 分區計算。"""
+    W, H, cover, span, sE, sC, count = (np.asarray(v, dtype=np.float64) for v in (W, H, cover, span, sE, sC, count))
+    sized = (W > 0) & (H > 0); auto = ~(count > 0)
+    return [
+        (~sized, "箍筋需填寫寬 W 與深 H"),
+        (sized & ((W <= 2*cover) | (H <= 2*cover)), "斷面尺寸需大於兩倍保護層"),
+        (auto & ~(span > 0), "未填支數時需填寫淨跨距 Span"),
+        (auto & ~(sC > 0), "一般區間距 sC 需大於 0"),
+        (auto & ~(sE >= 0), "加密區間距 sE 不可為負"),
+        (count < 0, "支數不可為負"),
+    ]
+
+
+def spiral_errors(D, L, P, cover, count=np.nan):
+    """螺旋箍筋輸入檢查，格式同 stirrup_errors。"""
+    D, L, P, cover, count = (np.asarray(v, dtype=np.float64) for v in (D, L, P, cover, count))
+    return [
+        (~((D > 0) & (P > 0) & (L > 0)), "螺旋箍筋需填寫 D、L、P"),
+        ((D > 0) & (D <= 2*cover), "直徑需大於兩倍保護層"),
+        (count < 0, "支數不可為負"),
+    ]
+
+
+def lap_errors(base_len, lap, stock_len):
+    """超過定尺需拆料時，搭接長度需小於定尺 (否則 split_rebar 無法前進)，格式同 stirrup_errors。"""
+    base_len, lap = np.asarray(base_len, dtype=np.float64), np.asarray(lap, dtype=np.float64)
+    return [((base_len > stock_len) & (lap >= stock_len), "搭接長度需小於定尺長度")]
+
+
+def raise_errors(checks):
+    """單筆 (純量) 檢查結果有錯誤時以 ValueError 拋出，多個錯誤合併為一則訊息。"""
+    msgs = [msg for bad, msg in checks if bad]
+    if msgs: raise ValueError("；".join(msgs))
@@ -0,0 +1,123 @@
+# === 定尺排料 (Cutting stock)：將拆料後的需求長度套裁至定尺鋼筋 ===
+# First-fit decreasing：長度由長到短，依序放入第一支剩餘長度足夠的定尺。
+# 以線段樹 (max segment tree) 尋找「第一支放得下的定尺」，相同長度一次放入多支，
+# 5 萬支以上的需求也能在數秒內完成。長度一律換算為 mm 整數運算，避免浮點誤差。
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from rebar.core import REBAR_DB
+
+PATTERN_COLUMNS = ["番號", "定尺(cm)", "支數", "裁切組合", "使用長(cm)", "餘料(cm)"]
+SUMMARY_COLUMNS = ["番號", "需求支數", "定尺支數", "需求長(cm)", "定尺總長(cm)", "損耗率(%)"]
+_SIZE_ORDER = {s: i for i, s in enumerate(REBAR_DB)}
+
+
+def _to_mm(length_cm):
+    return int(round(length_cm * 10))
+
+
+def pack_ffd(lengths, counts, stock_lens, improve=True):
+    """將 (長度, 支數) 需求以 FFD 套裁至定尺，長度單位為 mm 整數。
+
+    回傳 ``(bars, oversize)``：``bars`` 為 ``[(定尺, ((長度, 數量), ...), 支數), ...]``，
+    相同裁切組合已合併；``oversize`` 為超過最大定尺、無法套裁的 ``{長度: 支數}``。
+    ``improve`` 開啟時，每支定尺改用可容納該組合的最短定尺。
+    """
+    stock_lens = sorted(int(s) for s in stock_lens)
+    if not stock_lens:
+        raise ValueError("請至少選擇一種定尺")
+    max_stock = stock_lens[-1]
+
+    demand = Counter()
+    for L, m in zip(lengths, counts):
+        if m > 0 and L > 0: demand[int(L)] += int(m)
+    oversize = {L: m for L, m in demand.items() if L > max_stock}
+    # 與定尺等長者 (split_rebar 的定尺段) 直接整支使用，不需套裁
+    grouped = Counter({(L, ((L, 1),)): demand[L] for L in stock_lens if L in demand})
+    order = sorted((L for L in demand if L <= max_stock and L not in stock_lens), reverse=True)
+    if not order:
+        return [(stock, pat, n) for (stock, pat), n in grouped.items()], oversize
+
+    # 定尺支數上限：每種長度各自裝滿所需的支數總和
+    n_slots = sum(math.ceil(demand[L] / (max_stock // L)) for L in order)
+    size = 1
+    while size < n_slots: size *= 2
+    tree = [max_stock] * (2 * size)
+    patterns = [None] * n_slots
+    opened = 0
+
+    def _update(lo, hi, rem):
+        # 將第 lo..hi-1 支定尺的剩餘長度設為 rem，並逐層更新父節點
+        tree[size + lo:size + hi] = [rem] * (hi - lo)
+        lo = (size + lo) // 2; hi = (size + hi - 1) // 2
+        while lo:
+            for j in range(lo, hi + 1):
+                tree[j] = max(tree[2 * j], tree[2 * j + 1])
+            lo //= 2; hi //= 2
+
+    for L in order:
+        m = demand[L]
+        while m > 0:
+            i = 1
+            while i < size:
+                i = 2 * i if tree[2 * i] >= L else 2 * i + 1
+            slot = i - size
+            if slot >= opened:
+                # 已開啟的定尺都放不下：其餘支數一次配置到新定尺 (每支裝 k 段)
+                k = max_stock // L
+                q, r = divmod(m, k)
+                for j in range(opened, opened + q): patterns[j] = [(L, k)]
+                if q: _update(opened, opened + q, max_stock - k * L)
+                opened += q
+                if r:
+                    patterns[opened] = [(L, r)]
+                    _update(opened, opened + 1, max_stock - r * L)
+                    opened += 1
+                break
+            k = min(m, tree[i] // L)
+            patterns[slot].append((L, k))
+            m -= k
+            _update(slot, slot + 1, tree[i] - k * L)
+
+    for slot in range(opened):
+        pat = tuple(patterns[slot])
+        stock = max_stock
+        if improve:
+            used = max_stock - tree[size + slot]
+            stock = next(s for s in stock_lens if s >= used)
+        grouped[(stock, pat)] += 1
+    bars = [(stock, pat, n) for (stock, pat), n in grouped.items()]
+    return bars, oversize
+
+
+def cutting_plan(df, stock_lens, improve=True):
+    """依番號將明細表的 (單支長, 支數) 套裁至定尺 (cm)，回傳 (排料組合表, 損耗統計表)，番號依 REBAR_DB 排序。"""
+    stock_mm = [_to_mm(s) for s in stock_lens]
+    pattern_rows = []; summary_rows = []
+    if df.empty:
+        return pd.DataFrame(columns=PATTERN_COLUMNS), pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    mm = np.rint(df["單支長"].to_numpy(dtype=np.float64) * 10).astype(np.int64)
+    demand = (pd.DataFrame({"番號": df["番號"].to_numpy(), "L": mm, "n": df["支數"].to_numpy(dtype=np.int64)})
+              .groupby(["番號", "L"], sort=False)["n"].sum().reset_index())
+
+    for size_key, grp in sorted(demand.groupby("番號", sort=False), key=lambda kv: _SIZE_ORDER[kv[0]]):
+        bars, oversize = pack_ffd(grp["L"].tolist(), grp["n"].tolist(), stock_mm, improve)
+        bars.sort(key=lambda b: (-b[0], -sum(L * k for L, k in b[1]), -b[2]))
+        stock_total = 0; used_total = 0; n_bars = 0
+        for stock, pat, n in bars:
+            used = sum(L * k for L, k in pat)
+            combo = " + ".join(f"{L / 10:g}×{k}" if k > 1 else f"{L / 10:g}" for L, k in pat)
+            pattern_rows.append([size_key, stock / 10, n, combo, used / 10, (stock - used) / 10])
+            stock_total += stock * n; used_total += used * n; n_bars += n
+        for L, n in sorted(oversize.items(), reverse=True):
+            # 超過最大定尺者無法套裁，需另行拆料或訂製
+            pattern_rows.append([size_key, L / 10, n, f"{L / 10:g} (超過定尺)", L / 10, 0.0])
+            stock_total += L * n; used_total += L * n; n_bars += n
+        waste = (stock_total - used_total) / stock_total * 100 if stock_total else 0.0
+        summary_rows.append([size_key, int(grp["n"].sum()), n_bars, used_total / 10, stock_total / 10, round(waste, 2)])
+
+    return pd.DataFrame(pattern_rows, columns=PATTERN_COLUMNS), pd.DataFrame(summary_rows, columns=SUMMARY_COLUMNS)
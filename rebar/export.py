@@ -0,0 +1,157 @@
+# === 加工明細 Excel 匯出 (write-only 串流模式) ===
+# 以 openpyxl write-only 工作簿逐列寫出，所有儲存格共用已註冊的具名樣式，
+# 不再為每格建立 Font/Border/Alignment，20 萬列也只佔用固定記憶體。
+# (已安裝 lxml 時 openpyxl 會自動使用較快的序列化器)
+import hashlib
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import pandas as pd
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, Side
+
+from rebar.report import PART_SUFFIX, cut_list
+
+DETAIL_HEADERS = ["編號", "番號", "形狀", "單支長\n(cm)", "支數", "總長\n(cm)", "單位重", "總重\n(kg)", "備註"]
+DETAIL_FIELDS = ["番號", "形狀", "單支長", "支數", "總長(cm)", "單位重", "總重", "備註"]
+SUMMARY_HEADERS = ["番號", "總重\n(kg)", "噸數", "金額"]
+PART_HEADERS = ["部位/備註", "番號", "總重\n(kg)", "噸數", "金額"]
+CUT_LIST_HEADERS = ["番號", "單支長\n(cm)", "支數", "總長\n(cm)", "單位重", "總重\n(kg)", "原始項次", "備註"]
+
+
+def _register_styles(wb):
+    border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+    styles = {
+        "rebar_title": NamedStyle(name="rebar_title", font=Font(name='微軟正黑體', bold=True, size=12)),
+        "rebar_header": NamedStyle(name="rebar_header", font=Font(name='微軟正黑體', bold=True, size=12), border=border,
+                                   alignment=Alignment(horizontal='center', vertical='center', wrap_text=True)),
+        "rebar_body": NamedStyle(name="rebar_body", font=Font(name='微軟正黑體', size=11), border=border,
+                                 alignment=Alignment(horizontal='center', vertical='center')),
+    }
+    for ns in styles.values(): wb.add_named_style(ns)
+
+
+class _SheetWriter:
+    # 每個具名樣式只解析一次，之後所有儲存格共用同一份樣式索引
+    def __init__(self, wb, title):
+        self.ws = wb.create_sheet(title)
+        self._styles = {}
+
+    def _style(self, name):
+        if name not in self._styles:
+            c = WriteOnlyCell(self.ws); c.style = name
+            self._styles[name] = c._style
+        return self._styles[name]
+
+    def row(self, values, style="rebar_body"):
+        sa = self._style(style)
+        cells = []
+        for v in values:
+            c = WriteOnlyCell(self.ws, value=v); c._style = sa
+            cells.append(c)
+        self.ws.append(cells)
+
+    def rows(self, columns, style="rebar_body"):
+        for values in zip(*columns): self.row(values, style)
+
+
+def _weight_table(df, keys, unit_price):
+    t = df.groupby(keys)["總重"].sum().reset_index()
+    t["噸數"] = t["總重"] / 1000; t["金額"] = t["噸數"] * unit_price
+    return t
+
+
+def export_excel(df, project_name, contact_person, structure_part, unit_price=0,
+                 cut_patterns=None, by_part=True, out=None, consolidated=False):
+    """匯出加工明細、番號統計、(選用) 部位統計、合併裁切清單與排料圖，回傳 xlsx bytes 或寫入 ``out``。"""
+    wb = Workbook(write_only=True)
+    _register_styles(wb)
+
+    detail = _SheetWriter(wb, "撿料單")
+    detail.row([f"建案名稱: {project_name}", None, None, None, f"聯絡人: {contact_person}", None, None, None,
+                f"結構部位: {structure_part}"], "rebar_title")
+    for ref in ("A1:D1", "E1:H1", "I1:L1"): detail.ws.merged_cells.add(ref)
+    detail.row(DETAIL_HEADERS, "rebar_header")
+    detail.rows([range(1, len(df) + 1)] + [df[c].tolist() for c in DETAIL_FIELDS])
+
+    summary = _SheetWriter(wb, "番號統計")
+    summary.row(SUMMARY_HEADERS, "rebar_header")
+    t = _weight_table(df, "番號", unit_price)
+    summary.rows([t["番號"].tolist(), t["總重"].round(2).tolist(), t["噸數"].round(3).tolist(), t["金額"].round(0).tolist()])
+
+    if by_part:
+        part = _SheetWriter(wb, "部位統計")
+        part.row(PART_HEADERS, "rebar_header")
+        t = _weight_table(df.assign(部位=df["備註"].str.replace(PART_SUFFIX, "", regex=True)), ["部位", "番號"], unit_price)
+        part.rows([t["部位"].tolist(), t["番號"].tolist(), t["總重"].round(2).tolist(),
+                   t["噸數"].round(3).tolist(), t["金額"].round(0).tolist()])
+
+    if consolidated:
+        merged = _SheetWriter(wb, "裁切清單")
+        merged.row(CUT_LIST_HEADERS, "rebar_header")
+        t = cut_list(df)
+        merged.rows([t[c].tolist() for c in t.columns])
+
+    if cut_patterns is not None and not cut_patterns.empty:
+        cut = _SheetWriter(wb, "排料圖")
+        cut.row(list(cut_patterns.columns), "rebar_header")
+        cut.rows([cut_patterns[c].tolist() for c in cut_patterns.columns])
+
+    if out is not None:
+        wb.save(out); return None
+    buf = BytesIO(); wb.save(buf)
+    return buf.getvalue()
+
+
+# === 匯出快取：依報表內容與表頭欄位雜湊，下載時才產生 ===
+def report_digest(*parts):
+    """以報表 DataFrame 內容與其他參數計算雜湊鍵 (DataFrame 以 pandas 逐列雜湊)。"""
+    h = hashlib.blake2b(digest_size=16)
+    for p in parts:
+        if isinstance(p, pd.DataFrame):
+            h.update(repr(list(p.columns)).encode())
+            h.update(pd.util.hash_pandas_object(p, index=False).to_numpy().tobytes())
+        else:
+            h.update(repr(p).encode())
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class ExportCache:
+    """以雜湊鍵快取匯出結果的 LRU，同時限制筆數與總位元組數。"""
+
+    def __init__(self, max_entries=8, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries; self.max_bytes = max_bytes
+        self._data = OrderedDict(); self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+        value = build()
+        with self._lock:
+            if key not in self._data:
+                self._data[key] = value; self._bytes += len(value)
+            while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                _, old = self._data.popitem(last=False); self._bytes -= len(old)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear(); self._bytes = 0
+
+
+EXPORT_CACHE = ExportCache()
+
+
+def cached_export_excel(df, project_name, contact_person, structure_part, unit_price=0,
+                        cut_patterns=None, by_part=True, consolidated=False):
+    """與 export_excel 相同，但相同內容與表頭只產生一次。"""
+    key = report_digest(df, project_name, contact_person, structure_part, unit_price, by_part, consolidated, cut_patterns)
+    return EXPORT_CACHE.get_or_build(key, lambda: export_excel(
+        df, project_name, contact_person, structure_part, unit_price, cut_patterns, by_part, consolidated=consolidated))
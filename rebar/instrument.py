@@ -0,0 +1,74 @@
+# === 每次 rerun 的階段計時 ===
+# 以 with timer.stage("名稱", rows=...) 包住各區塊，記錄耗時與項目/列數。
+# 停用時 stage() 直接回傳共用的空 context manager，額外負擔僅一次屬性判斷。
+import json
+import threading
+import time
+from contextlib import nullcontext
+
+_NULL = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("timer", "record", "t0")
+
+    def __init__(self, timer, record):
+        self.timer = timer; self.record = record
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self.record
+
+    def __exit__(self, *exc):
+        self.record["ms"] = round((time.perf_counter() - self.t0) * 1000, 3)
+        self.timer.records.append(self.record)
+        return False
+
+
+class RerunTimer:
+    """單次 rerun 的階段計時器；``log_path`` 有值時 finish() 會附加一行 JSON。"""
+
+    _log_lock = threading.Lock()
+
+    def __init__(self, enabled=False, log_path=None):
+        self.enabled = enabled
+        self.log_path = log_path
+        self.records = []
+        self.t0 = time.perf_counter()
+
+    def stage(self, name, **counts):
+        if not self.enabled: return _NULL
+        return _Stage(self, {"stage": name, **counts})
+
+    def count(self, name, **counts):
+        """補記最近一次 ``name`` 階段的數量 (如結束後才知道的列數)。"""
+        if not self.enabled: return
+        for rec in reversed(self.records):
+            if rec["stage"] == name: rec.update(counts); return
+
+    def wrap(self, name, fn, sink, **counts):
+        """包裝在 rerun 之後才執行的函式 (如下載檔案產生)，結果寫入 ``sink[name]`` 並記錄。"""
+        if not self.enabled: return fn
+        log_path = self.log_path
+
+        def timed():
+            t = time.perf_counter()
+            out = fn()
+            rec = {"stage": name, **counts, "ms": round((time.perf_counter() - t) * 1000, 3), "ts": time.time()}
+            sink[name] = rec
+            if log_path: _append(log_path, {"deferred": True, **rec})
+            return out
+        return timed
+
+    def finish(self, **extra):
+        """結束計時，回傳本次紀錄 (停用時為 None)。"""
+        if not self.enabled: return None
+        run = {"ts": time.time(), "total_ms": round((time.perf_counter() - self.t0) * 1000, 3),
+               **extra, "stages": self.records}
+        if self.log_path: _append(self.log_path, run)
+        return run
+
+
+def _append(path, record):
+    with RerunTimer._log_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
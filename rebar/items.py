@@ -0,0 +1,161 @@
+# === 精簡欄式原始資料容器 ===
+# 取代 raw_data_list 的 list of dict：數值欄為預留容量的 NumPy 陣列，番號/模式存為 int8 代碼
+# (單位重由 REBAR_DB 查得，不另存)，形狀與備註字串經 sys.intern 共用同一物件。
+# 新增為攤銷 O(1)；刪除需保持原始順序 (raw_idx 即列號)，pop 為各欄一次 memmove (O(n))，
+# 多筆刪除以 delete 一次壓縮各欄，成本與刪除一筆相同。
+# 另存每筆的專案存檔 id (未存檔為 -1)，刪除時依 id 寫回存檔。
+# 仍可當作 dict 序列使用 (len / 索引 / 迭代)，與既有程式相容；單位重一律依番號由 REBAR_DB 取得。
+# 記憶體比較：python -m rebar.items
+import sys
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from rebar.core import REBAR_DB
+
+SIZES = tuple(REBAR_DB)
+MODES = ("main", "stirrup")
+_SIZE_CODE = {s: i for i, s in enumerate(SIZES)}
+_MODE_CODE = {m: i for i, m in enumerate(MODES)}
+_WEIGHTS = np.array([REBAR_DB[s]['weight'] for s in SIZES], dtype=np.float64)
+_COLUMNS = {"mode": np.int8, "size": np.int8, "shape_str": object,
+            "base_len": np.float64, "lap_len": np.float64, "count": np.float64, "note": object, "id": np.int64}
+
+
+class ItemTable:
+    """欄式存放的撿料原始資料，介面與 raw_data_list 相同 (append / extend / pop / 迭代)。"""
+
+    def __init__(self, items=(), capacity=64):
+        self._n = 0
+        self._cols = {k: np.empty(capacity, dtype=t) for k, t in _COLUMNS.items()}
+        self.extend(items)
+
+    @classmethod
+    def from_columns(cls, cols):
+        """由欄式資料 (items_to_columns / ProjectStore.load 格式) 一次建立。"""
+        n = len(cols["base_len"])
+        table = cls(capacity=max(n, 64)); c = table._cols
+        c["mode"][:n] = np.fromiter((_MODE_CODE[m] for m in cols["mode"]), dtype=np.int8, count=n)
+        c["size"][:n] = np.fromiter((_SIZE_CODE[s] for s in cols["size_key"]), dtype=np.int8, count=n)
+        c["shape_str"][:n] = [sys.intern(s) for s in cols["shape_str"]]
+        c["note"][:n] = [sys.intern(s) for s in cols["note"]]
+        for k in ("base_len", "lap_len", "count"): c[k][:n] = cols[k]
+        c["id"][:n] = cols.get("id", -1)
+        table._n = n
+        return table
+
+    def __len__(self):
+        return self._n
+
+    def _reserve(self, n):
+        cap = len(self._cols["count"])
+        if n <= cap: return
+        cap = max(n, cap * 2)
+        for k, a in self._cols.items():
+            grown = np.empty(cap, dtype=a.dtype); grown[:self._n] = a[:self._n]
+            self._cols[k] = grown
+
+    def append(self, item, item_id=-1):
+        i = self._n
+        self._reserve(i + 1)
+        c = self._cols
+        c["mode"][i] = _MODE_CODE[item["mode"]]; c["size"][i] = _SIZE_CODE[item["size_key"]]
+        c["shape_str"][i] = sys.intern(item["shape_str"]); c["note"][i] = sys.intern(item["note"])
+        c["base_len"][i] = item["base_len"]; c["lap_len"][i] = item["lap_len"]; c["count"][i] = item["count"]
+        c["id"][i] = item_id
+        self._n = i + 1
+
+    def extend(self, items, ids=None):
+        if ids is None: ids = items.ids().tolist() if isinstance(items, ItemTable) else repeat(-1)
+        for it, item_id in zip(items, ids): self.append(it, item_id)
+
+    def ids(self):
+        """各筆的專案存檔 id (view，未存檔為 -1)。"""
+        return self._cols["id"][:self._n]
+
+    def _row(self, i):
+        c = self._cols; size = SIZES[c["size"][i]]
+        return {"mode": MODES[c["mode"][i]], "size_key": size, "shape_str": c["shape_str"][i],
+                "base_len": float(c["base_len"][i]), "lap_len": float(c["lap_len"][i]),
+                "count": float(c["count"][i]), "uw": REBAR_DB[size]['weight'], "note": c["note"][i]}
+
+    def __getitem__(self, i):
+        if i < 0: i += self._n
+        if not 0 <= i < self._n: raise IndexError(i)
+        return self._row(i)
+
+    def __iter__(self):
+        return (self._row(i) for i in range(self._n))
+
+    def pop(self, i=-1):
+        """移除並回傳第 i 筆；其後各列前移 (O(n))，多筆請用 delete。"""
+        if i < 0: i += self._n
+        item = self[i]
+        for a in self._cols.values():
+            a[i:self._n - 1] = a[i + 1:self._n]
+        self._n -= 1
+        self._cols["shape_str"][self._n] = None; self._cols["note"][self._n] = None
+        return item
+
+    def delete(self, idxs):
+        """一次刪除多筆 (索引不需排序)，各欄只壓縮一次。"""
+        keep = np.ones(self._n, dtype=bool); keep[list(idxs)] = False
+        m = int(keep.sum())
+        for a in self._cols.values():
+            a[:m] = a[:self._n][keep]
+            if a.dtype == object: a[m:self._n] = None
+        self._n = m
+
+    def clear(self):
+        self._n = 0
+        self._cols["shape_str"][:] = None; self._cols["note"][:] = None
+
+    def to_columns(self):
+        """回傳 items_to_columns 格式的欄式陣列 (數值欄為內部陣列的 view，不複製)。"""
+        c = self._cols; n = self._n; size = c["size"][:n]
+        return {"mode": np.asarray(MODES, dtype=object)[c["mode"][:n]], "size_key": np.asarray(SIZES, dtype=object)[size],
+                "shape_str": c["shape_str"][:n], "base_len": c["base_len"][:n], "lap_len": c["lap_len"][:n],
+                "count": c["count"][:n], "uw": _WEIGHTS[size], "note": c["note"][:n]}
+
+    def to_frame(self):
+        """以 DataFrame 檢視：數值與字串欄直接引用內部陣列 (不複製)，番號/模式為 Categorical。"""
+        c = self._cols; n = self._n
+        return pd.DataFrame({
+            "mode": pd.Categorical.from_codes(c["mode"][:n], MODES),
+            "size_key": pd.Categorical.from_codes(c["size"][:n], SIZES),
+            "shape_str": pd.Series(c["shape_str"][:n], dtype=object, copy=False),
+            "base_len": c["base_len"][:n], "lap_len": c["lap_len"][:n], "count": c["count"][:n],
+            "note": pd.Series(c["note"][:n], dtype=object, copy=False)}, copy=False)
+
+    def nbytes(self):
+        """實際使用的位元組數：各欄陣列 (依筆數) 加上不重複字串物件。"""
+        per_item = sum(a.itemsize for a in self._cols.values())
+        strings = {id(s): sys.getsizeof(s) for k in ("shape_str", "note") for s in self._cols[k][:self._n]}
+        return per_item * self._n + sum(strings.values())
+
+
+def dict_list_nbytes(items):
+    """list of dict 形式的位元組數 (list、各 dict 與其不重複的值物件，鍵字串為共用常數不計)。"""
+    seen = {}
+    total = sys.getsizeof(items)
+    for it in items:
+        total += sys.getsizeof(it)
+        for v in it.values(): seen.setdefault(id(v), sys.getsizeof(v))
+    return total + sum(seen.values())
+
+
+def memory_report(items):
+    """回傳 (list of dict 每筆位元組, ItemTable 每筆位元組)。需逐筆建立 dict 比較，10 萬筆約需 1 秒。"""
+    n = len(items)
+    if n == 0: return 0.0, 0.0
+    dicts = list(items)
+    table = items if isinstance(items, ItemTable) else ItemTable(items)
+    return dict_list_nbytes(dicts) / n, table.nbytes() / n
+
+
+if __name__ == "__main__":
+    from rebar.bench import synthetic_members, members_to_items
+    for n in (1_000, 10_000, 100_000):
+        before, after = memory_report(members_to_items(synthetic_members(n)))
+        print(f"{n:>7} 筆：list of dict {before:6.0f} bytes/筆 → ItemTable {after:5.0f} bytes/筆 ({before / after:.1f}x)")
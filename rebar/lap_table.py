@@ -0,0 +1,100 @@
+# === S7-01 搭接/握裹長度預編譯表 ===
+# 匯入時將 S7_DATA 巢狀 dict 編譯為 (fy, fc, 番號, 類型) 四維陣列；非表列強度的公式值
+# 依 (fc, fy) 快取，可選擇在表列 f'c 欄位間線性內插。整批查詢只需一次陣列 gather。
+# 與 lookup_data 的逐格比對見 tests/test_lap_table.py
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from rebar.core import REBAR_DB, S7_DATA
+
+FY_VALUES = tuple(sorted(S7_DATA))
+FC_VALUES = tuple(sorted({fc for t in S7_DATA.values() for fc in t}))
+SIZES = tuple(REBAR_DB)
+KINDS = ('tension_B', 'tension_Top', 'compression', 'develop', 'develop_Top')
+# 各類型欄位對應的 S7_DATA 表：握裹長度表不分頂層，頂層僅影響公式估算值 (同 lookup_data)
+KIND_TABLES = ('tension_B', 'tension_Top', 'compression', 'develop', 'develop')
+SIZE_CODE = {s: i for i, s in enumerate(SIZES)}
+TYPE_MODES = ('tension', 'compression', 'develop')   # lookup_data/lap_length 的 type_mode
+
+# TABLE[fy, fc, 番號, 類型]，0 表示標準圖無此格 (需以公式估算)
+TABLE = np.zeros((len(FY_VALUES), len(FC_VALUES), len(SIZES), len(KINDS)), dtype=np.int32)
+for _i, _fy in enumerate(FY_VALUES):
+    for _j, _fc in enumerate(FC_VALUES):
+        _cells = S7_DATA[_fy].get(_fc, {})
+        for _k, _kind in enumerate(KIND_TABLES):
+            for _s, _size in enumerate(SIZES):
+                TABLE[_i, _j, _s, _k] = _cells.get(_kind, {}).get(_size, 0)
+
+DESC_TABLE = "標準圖查表"
+DESC_INTERP = "標準圖內插"
+DESC_FORMULA = "公式估算"
+
+
+def kind_code(type_mode, is_top=False):
+    if type_mode == 'compression': return 2
+    if type_mode == 'develop': return 4 if is_top else 3
+    return 1 if is_top else 0
+
+
+@lru_cache(maxsize=64)
+def _formula(fc, fy):
+    # 與 lookup_data 相同的公式 (依 fc, fy 快取整張 番號×類型 表)
+    out = np.zeros((len(SIZES), len(KINDS)), dtype=np.int32)
+    for s, size in enumerate(SIZES):
+        db = REBAR_DB[size]['db']
+        factor = 46 * (fy / 4200) * math.sqrt(280 / fc)
+        out[s, 0] = math.ceil(factor * db * 1.3)
+        out[s, 1] = math.ceil(factor * 1.3 * db * 1.3)
+        out[s, 2] = max(math.ceil(0.043 * fy * db), 20)
+        out[s, 3] = out[s, 0]
+        out[s, 4] = out[s, 1]
+    return out
+
+
+def _tabulated(fc, fy, interpolate):
+    # 回傳 (表值, 說明)；表值 0 的格子由公式補上
+    if fy not in FY_VALUES: return None, None
+    i = FY_VALUES.index(fy)
+    if fc in S7_DATA[fy]:
+        return TABLE[i, FC_VALUES.index(fc)], DESC_TABLE
+    if not interpolate: return None, None
+    # 僅在該 fy 有資料的相鄰 f'c 欄位間內插，超出範圍則使用公式
+    cols = [j for j, v in enumerate(FC_VALUES) if v in S7_DATA[fy]]
+    lo = [j for j in cols if FC_VALUES[j] < fc]; hi = [j for j in cols if FC_VALUES[j] > fc]
+    if not lo or not hi: return None, None
+    j0, j1 = lo[-1], hi[0]
+    v0 = TABLE[i, j0].astype(np.float64); v1 = TABLE[i, j1].astype(np.float64)
+    t = (fc - FC_VALUES[j0]) / (FC_VALUES[j1] - FC_VALUES[j0])
+    vals = np.ceil(v0 + (v1 - v0) * t).astype(np.int32)
+    vals[(v0 == 0) | (v1 == 0)] = 0
+    return vals, DESC_INTERP
+
+
+@lru_cache(maxsize=64)
+def resolved_table(fc, fy, interpolate=False):
+    """回傳 (fc, fy) 下完整的 番號×類型 長度表與說明表 (已快取)。"""
+    vals, desc = _tabulated(fc, fy, interpolate)
+    formula = _formula(fc, fy)
+    if vals is None:
+        return formula, np.full(formula.shape, DESC_FORMULA, dtype=object)
+    missing = vals == 0
+    return np.where(missing, formula, vals), np.where(missing, DESC_FORMULA, desc).astype(object)
+
+
+def lap_length(fc, fy, size, type_mode, is_top=False, interpolate=False):
+    """與 lookup_data 相同介面的查表，回傳 (長度, 說明)。"""
+    vals, desc = resolved_table(fc, fy, interpolate)
+    s = SIZE_CODE[size]; k = kind_code(type_mode, is_top)
+    return int(vals[s, k]), desc[s, k]
+
+
+def lap_lengths(fc, fy, sizes, type_modes, is_top=False, interpolate=False):
+    """整批查詢：sizes/type_modes/is_top 可為陣列，回傳長度陣列 (單次 gather)。"""
+    vals, _ = resolved_table(fc, fy, interpolate)
+    codes = np.fromiter((SIZE_CODE[s] for s in sizes), dtype=np.intp)
+    modes = np.broadcast_to(np.asarray(type_modes, dtype=object), codes.shape)
+    top = np.broadcast_to(np.asarray(is_top, dtype=bool), codes.shape)
+    kinds = np.where(modes == 'compression', 2, np.where(modes == 'develop', 3, 0) + top)
+    return vals[codes, kinds]
@@ -0,0 +1,349 @@
+# === 即時運算加工明細表：欄式 (columnar) 報表引擎 ===
+# 以 NumPy/pandas 一次展開所有撿料項目，數值與逐筆迴圈版本完全相同。
+import sys
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from rebar.core import REBAR_DB
+
+REPORT_COLUMNS = ["raw_idx", "番號", "形狀", "單支長", "支數", "總長(cm)", "單位重", "總重", "備註"]
+# 拆料/合併標記，統計時去除以還原原始備註
+PART_SUFFIX = r" \((?:Part \d+/\d+ (?:定尺|餘料)|含搭接-?\d+處)\)$"
+
+
+def round_values(values, ndigits):
+    """與 Python round() 結果相同的陣列四捨五入 (.5 邊界值改用 round()，np.round 在此可能不同)。"""
+    out = np.round(values, ndigits)
+    scaled = values * (10 ** ndigits)
+    tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if tie.any():
+        out[tie] = [round(v, ndigits) for v in values[tie].tolist()]
+    return out
+
+
+def items_to_columns(items):
+    """將 raw_data_list (list of dict 或 ItemTable) 轉為欄式陣列。"""
+    if hasattr(items, "to_columns"): return items.to_columns()
+    return {
+        "mode": np.array([it['mode'] for it in items], dtype=object),
+        "size_key": np.array([it['size_key'] for it in items], dtype=object),
+        "shape_str": np.array([it['shape_str'] for it in items], dtype=object),
+        "base_len": np.array([it['base_len'] for it in items], dtype=np.float64),
+        "lap_len": np.array([it['lap_len'] for it in items], dtype=np.float64),
+        "count": np.array([it['count'] for it in items], dtype=np.float64),
+        "uw": np.array([it['uw'] for it in items], dtype=np.float64),
+        "note": np.array([it['note'] for it in items], dtype=object),
+    }
+
+
+def split_counts(b_len, lap, stock_len):
+    """與 split_rebar 相同的逐次扣減 (rem -= stock_len - lap)，對所有項目同時進行，回傳 (定尺支數, 餘料長)。"""
+    step = stock_len - lap
+    if (step <= 0).any():
+        raise ValueError("搭接長度需小於定尺長度")
+    rem = b_len.copy()
+    n_full = np.zeros(len(b_len), dtype=np.int64)
+    active = rem > stock_len
+    while active.any():
+        rem[active] -= step[active]
+        n_full[active] += 1
+        active = rem > stock_len
+    return n_full, rem
+
+
+def build_report(items, stock_len, auto_split):
+    """將原始撿料項目展開為加工明細 DataFrame (拆料或合併搭接)。
+
+    ``items`` 可為 raw_data_list 或 :func:`items_to_columns` 的輸出。
+    """
+    cols = items if isinstance(items, dict) else items_to_columns(items)
+    n = len(cols['base_len'])
+    if n == 0:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+
+    b_len = cols['base_len']; lap = cols['lap_len']; count = cols['count']
+    note = pd.Series(cols['note'], dtype=object)
+    passthrough = (cols['mode'] == 'stirrup') | (b_len <= stock_len)
+    long_idx = np.flatnonzero(~passthrough)
+
+    if auto_split:
+        # 每個項目展開為 n_full 支定尺 + 1 支餘料，直料/箍筋則維持 1 支
+        n_full = np.zeros(n, dtype=np.int64); rem = b_len.copy()
+        if len(long_idx):
+            n_full[long_idx], rem[long_idx] = split_counts(b_len[long_idx], lap[long_idx], stock_len)
+        n_pieces = n_full + 1
+        src = np.repeat(np.arange(n), n_pieces)
+        starts = np.cumsum(n_pieces) - n_pieces
+        p_idx = np.arange(len(src)) - np.repeat(starts, n_pieces)
+        p_len = np.where(p_idx < n_full[src], float(stock_len), rem[src])
+
+        row_note = note.iloc[src].reset_index(drop=True)
+        split_rows = ~passthrough[src]
+        if split_rows.any():
+            label = np.where(p_len[split_rows] == stock_len, '定尺', '餘料')
+            suffix = (" (Part " + pd.Series(p_idx[split_rows] + 1).astype(str) + "/"
+                      + pd.Series(n_pieces[src][split_rows]).astype(str) + " " + label + ")")
+            row_note[split_rows] = row_note[split_rows].to_numpy() + suffix.to_numpy()
+    else:
+        # 合併顯示：laps = floor(L / 定尺)，整除時少一處搭接
+        src = np.arange(n)
+        laps = np.floor(b_len / stock_len)
+        laps -= (np.mod(b_len, stock_len) == 0)
+        laps = laps.astype(np.int64)
+        p_len = np.where(passthrough, b_len, b_len + laps * lap)
+        row_note = note.copy()
+        if len(long_idx):
+            suffix = " (含搭接" + pd.Series(laps[long_idx]).astype(str) + "處)"
+            row_note[long_idx] = row_note[long_idx].to_numpy() + suffix.to_numpy()
+
+    r_count = count[src]; r_uw = cols['uw'][src]
+    return pd.DataFrame({
+        "raw_idx": src,
+        "番號": cols['size_key'][src],
+        "形狀": cols['shape_str'][src],
+        "單支長": round_values(p_len, 1),
+        "支數": r_count.astype(np.int64),
+        "總長(cm)": round_values(p_len * r_count, 1),
+        "單位重": r_uw,
+        "總重": round_values((p_len / 100) * r_uw * r_count, 2),
+        "備註": row_note.to_numpy(),
+    }, columns=REPORT_COLUMNS)
+
+
+# === 增量展開快取 ===
+ITEM_FIELDS = ("mode", "size_key", "shape_str", "base_len", "lap_len", "count", "uw", "note")
+_ROW_FIELDS = REPORT_COLUMNS[1:]
+_ROW_DTYPES = {"番號": object, "形狀": object, "單支長": np.float64, "支數": np.int64,
+               "總長(cm)": np.float64, "單位重": np.float64, "總重": np.float64, "備註": object}
+
+
+class _Columns:
+    # 預留容量的欄式陣列 (同 ItemTable)：尾端新增為攤銷 O(1)，刪除區段為各欄一次 memmove
+    def __init__(self, dtypes, capacity=64):
+        self.n = 0
+        self.cols = {k: np.empty(capacity, dtype=t) for k, t in dtypes.items()}
+
+    def extend(self, values):
+        m = len(next(iter(values.values())))
+        end = self.n + m
+        cap = len(next(iter(self.cols.values())))
+        if end > cap:
+            cap = max(end, cap + cap // 2)
+            for k, a in self.cols.items():
+                grown = np.empty(cap, dtype=a.dtype); grown[:self.n] = a[:self.n]
+                self.cols[k] = grown
+        for k, a in self.cols.items(): a[self.n:end] = values[k]
+        self.n = end
+
+    def nbytes(self):
+        # 已用列的陣列位元組加上不重複字串物件 (同 ItemTable.nbytes)
+        strings = {id(v): sys.getsizeof(v) for a in self.cols.values() if a.dtype == object for v in a[:self.n]}
+        return sum(a.itemsize for a in self.cols.values()) * self.n + sum(strings.values())
+
+    def keep(self, mask):
+        # 只保留 mask 為 True 的列 (各欄一次壓縮，刪除多筆與一筆成本相同)
+        m = int(mask.sum())
+        for a in self.cols.values():
+            a[:m] = a[:self.n][mask]
+            if a.dtype == object: a[m:self.n] = None
+        self.n = m
+
+    def clear(self):
+        self.keep(np.zeros(self.n, dtype=bool))
+
+    def __getitem__(self, k):
+        return self.cols[k][:self.n]
+
+
+class _Expansion:
+    # 單一 (定尺, 拆料) 設定下的展開列與各項目 (slot) 的列數、番號總重。
+    # 刪除只將 slot 標記為失效 (O(項目數))，失效列超過一半時才壓縮陣列，攤銷後與新增相同
+    def __init__(self):
+        self.rows = _Columns(_ROW_DTYPES)
+        self.slots = _Columns({"rows": np.int64, "live": bool})
+        self.n_live = 0; self.n_dead_rows = 0
+        self.totals = {}             # 番號 -> [總重, 列數]
+
+    def __len__(self):
+        return self.n_live
+
+    def extend(self, df, n):
+        # df 為 n 筆新項目的 build_report 結果；字串欄重複度高，intern 後共用同一物件
+        values = {c: df[c].to_numpy(dtype=t) for c, t in _ROW_DTYPES.items()}
+        for c in ("番號", "形狀", "備註"):
+            values[c] = np.array([sys.intern(v) for v in values[c].tolist()], dtype=object)
+        self.rows.extend(values)
+        self.slots.extend({"rows": np.bincount(df["raw_idx"].to_numpy(dtype=np.int64), minlength=n), "live": np.ones(n, dtype=bool)})
+        self.n_live += n
+        self._add_totals(values["番號"], values["總重"], 1)
+
+    def _live_rows(self):
+        return np.repeat(self.slots["live"], self.slots["rows"])
+
+    def delete(self, raw_idxs):
+        # raw_idxs 為目前 (刪除前) 的項目索引，經有效 slot 對應至實際位置
+        slot = np.flatnonzero(self.slots["live"])[raw_idxs]
+        drop = np.zeros(self.slots.n, dtype=bool); drop[slot] = True
+        drop_rows = np.repeat(drop, self.slots["rows"])
+        self._add_totals(self.rows["番號"][drop_rows], self.rows["總重"][drop_rows], -1)
+        self.slots["live"][slot] = False
+        self.n_live -= len(slot); self.n_dead_rows += int(self.slots["rows"][slot].sum())
+        if self.n_dead_rows * 2 > self.rows.n:
+            self.rows.keep(self._live_rows()); self.slots.keep(self.slots["live"].copy())
+            self.n_dead_rows = 0
+
+    def clear(self):
+        self.rows.clear(); self.slots.clear(); self.totals = {}
+        self.n_live = 0; self.n_dead_rows = 0
+
+    def _add_totals(self, sizes, weights, sign):
+        if len(sizes) == 0: return
+        keys, inv = np.unique(sizes, return_inverse=True)
+        sums = np.bincount(inv, weights=weights); counts = np.bincount(inv)
+        for k, w, c in zip(keys.tolist(), sums.tolist(), counts.tolist()):
+            t = self.totals.setdefault(k, [0.0, 0])
+            t[0] += sign * w; t[1] += sign * c
+            if t[1] == 0: del self.totals[k]
+
+    def frame(self):
+        # 複製為獨立的 DataFrame (後續新增/刪除不影響已取得的明細)
+        live = self._live_rows() if self.n_dead_rows else slice(None)
+        df = pd.DataFrame({c: self.rows[c][live] for c in _ROW_FIELDS}, columns=_ROW_FIELDS, copy=True)
+        df.insert(0, "raw_idx", np.repeat(np.arange(self.n_live), self.slots["rows"][self.slots["live"]]))
+        return df
+
+
+class ReportCache:
+    """與 raw_data_list 對齊的展開快取。
+
+    最近 ``keep_settings`` 組 (定尺, 拆料模式) 的展開列以欄式陣列保存，新增/刪除只展開或移除該筆
+    (各組設定同步更新)，番號總重以增量方式維護；來回切換側邊欄設定不需重算。
+    記憶體只隨目前項目的展開列數與保留的設定組數增加，刪除的項目不會殘留。
+    """
+
+    def __init__(self, keep_settings=4):
+        self.keep_settings = keep_settings
+        self._exp = OrderedDict()    # (定尺, 拆料) -> _Expansion
+        self._settings = None
+        self._df = None
+
+    def _store(self, settings, exp):
+        self._exp[settings] = exp; self._exp.move_to_end(settings)
+        while len(self._exp) > self.keep_settings: self._exp.popitem(last=False)
+
+    @property
+    def totals(self):
+        exp = self._exp.get(self._settings)
+        return exp.totals if exp is not None else {}
+
+    def load_columns(self, cols, stock_len, auto_split):
+        """由欄式資料 (如專案存檔) 一次展開並建立快取。"""
+        settings = (stock_len, bool(auto_split))
+        exp = _Expansion(); exp.extend(build_report(cols, *settings), len(cols['base_len']))
+        self._exp.clear(); self._store(settings, exp)
+        self._settings = settings; self._df = None
+
+    def sync(self, items, stock_len, auto_split):
+        """確認快取與 raw_data_list 及設定一致，必要時 (設定未保留或外部修改) 重新展開。"""
+        settings = (stock_len, bool(auto_split))
+        exp = self._exp.get(settings)
+        if exp is None or len(exp) != len(items):
+            exp = _Expansion(); exp.extend(build_report(items_to_columns(items), *settings), len(items))
+            self._df = None
+        self._store(settings, exp)
+        if settings != self._settings: self._settings = settings; self._df = None
+        return self
+
+    def append(self, item, stock_len, auto_split):
+        self.extend([item], stock_len, auto_split)
+
+    def extend(self, items, stock_len, auto_split):
+        # 新項目於每組保留的設定各展開一次；目前設定展開失敗時直接拋出 (不加入)，其他設定則捨棄該組快取
+        settings = (stock_len, bool(auto_split))
+        cols = items_to_columns(items); n = len(cols['base_len'])
+        df = build_report(cols, *settings)
+        for s, exp in list(self._exp.items()):
+            try:
+                exp.extend(df if s == settings else build_report(cols, *s), n)
+            except ValueError:
+                del self._exp[s]
+        self._df = None
+
+    def pop(self, raw_idx):
+        self.delete([raw_idx])
+
+    def delete(self, raw_idxs):
+        """一次刪除多筆原始資料的展開列 (raw_idxs 為刪除前的索引)。"""
+        raw_idxs = np.asarray(raw_idxs, dtype=np.intp)
+        for s, exp in list(self._exp.items()):
+            if len(raw_idxs) and raw_idxs.max() >= len(exp): del self._exp[s]   # 已與原始資料不一致，下次 sync 重建
+            else: exp.delete(raw_idxs)
+        self._df = None
+
+    def clear(self):
+        for exp in self._exp.values(): exp.clear()
+        self._df = None
+
+    def nbytes(self):
+        """各組保留設定的展開列與 frame() 暫存明細的位元組數。"""
+        total = sum(exp.rows.nbytes() + exp.slots.nbytes() for exp in self._exp.values())
+        return total + (int(self._df.memory_usage(deep=False).sum()) if self._df is not None else 0)
+
+    def frame(self):
+        """組合目前的加工明細 DataFrame (內容未變時直接回傳上次結果)。"""
+        if self._df is None:
+            exp = self._exp.get(self._settings)
+            self._df = exp.frame() if exp is not None else pd.DataFrame(columns=REPORT_COLUMNS)
+        return self._df
+
+    def summary(self):
+        """番號總重 (增量維護)，與 df.groupby("番號")["總重"].sum() 相同排序。"""
+        return pd.DataFrame([(k, v[0]) for k, v in sorted(self.totals.items())], columns=["番號", "總重"])
+
+
+# === 合併裁切清單 ===
+CUT_LIST_COLUMNS = ["番號", "單支長", "支數", "總長(cm)", "單位重", "總重", "原始項次", "備註"]
+_SIZE_ORDER = {s: i for i, s in enumerate(REBAR_DB)}
+
+
+def _ranges(idx, limit):
+    # 已排序的不重複整數 → "1-5, 8, 10-12"，超過 limit 段時截斷並註明總項數
+    if len(idx) == 0: return ""
+    breaks = np.flatnonzero(np.diff(idx) != 1)
+    starts = np.r_[idx[0], idx[breaks + 1]][:limit]; ends = np.r_[idx[breaks], idx[-1]][:limit]
+    text = ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in zip(starts.tolist(), ends.tolist()))
+    return text + (f" … 共 {len(idx)} 項" if len(breaks) >= limit else "")
+
+
+def cut_list(df, ndigits=1, max_notes=3, max_ranges=5):
+    """將加工明細依 (番號, 單支長) 合併為裁切清單，支數/總長/總重加總。
+
+    單支長先四捨五入至 ``ndigits`` 位；原始項次 (raw_idx + 1) 以區間表示 (最多 ``max_ranges`` 段)，
+    備註去除拆料標記後最多列出 ``max_notes`` 項。
+    """
+    if df.empty:
+        return pd.DataFrame(columns=CUT_LIST_COLUMNS)
+    g = df.assign(單支長=round_values(df["單支長"].to_numpy(dtype=np.float64), ndigits)).groupby(["番號", "單支長"], sort=False)
+    out = g.agg(支數=("支數", "sum"), 總長=("總長(cm)", "sum"), 單位重=("單位重", "first"), 總重=("總重", "sum")).reset_index()
+    out = out.rename(columns={"總長": "總長(cm)"})
+    out["總長(cm)"] = round_values(out["總長(cm)"].to_numpy(dtype=np.float64), 1)
+    out["總重"] = round_values(out["總重"].to_numpy(dtype=np.float64), 2)
+
+    # 各組的來源項次與備註：依組別排序後以邊界切段
+    codes = g.ngroup().to_numpy()
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(out) + 1))
+    raw = df["raw_idx"].to_numpy()[order] + 1
+    notes = df["備註"].astype(str).str.replace(PART_SUFFIX, "", regex=True).to_numpy()[order]
+    sources = []; note_col = []
+    for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        sources.append(_ranges(np.unique(raw[a:b]), max_ranges))
+        u = list(dict.fromkeys(notes[a:b].tolist()))
+        note_col.append("、".join(u[:max_notes]) + (f" 等 {len(u)} 項" if len(u) > max_notes else ""))
+    out["原始項次"] = sources; out["備註"] = note_col
+
+    out["_size"] = out["番號"].map(_SIZE_ORDER)
+    out = out.sort_values(["_size", "單支長"], ascending=[True, False], kind="stable")
+    return out[CUT_LIST_COLUMNS].reset_index(drop=True)
@@ -0,0 +1,116 @@
+# === 批次構件表：梁/柱箍筋與樁螺旋箍筋 ===
+# 以 NumPy 一次計算整張構件表的箍筋長度、2H 加密區分區支數與螺旋箍筋長度/搭接，
+# 數值與 core 的逐筆公式 (stirrup_length/stirrup_count/spiral_length/spiral_lap) 相同。
+# 所有列先以 core 的共用檢查 (stirrup_errors/spiral_errors) 完成驗證，錯誤依列號彙整回傳，不會因單列錯誤中斷。
+#
+# 欄位 (表頭，空白可省略)：
+#   type      梁/柱 (beam/column/stirrup → 箍筋)、樁 (pile/spiral → 螺旋箍筋)；與 CLI 共用 core.MEMBER_TYPES
+#   size      番號，如 #4
+#   W, H, Span, sE, sC       箍筋寬深、淨跨距、加密區/一般區間距 (sE=0 表無加密)
+#   D, L, P   螺旋箍筋直徑、樁長、間距
+#   count     支數 (箍筋未填時依 Span 分區計算；螺旋箍筋預設 1)
+#   lap, cover, note         螺旋箍筋搭接 (未填為 1.5 圈)、保護層、備註
+import numpy as np
+import pandas as pd
+
+from rebar.core import MEMBER_TYPES, REBAR_DB, lap_errors, make_item, spiral_errors, stirrup_errors
+from rebar.report import round_values
+
+SCHEDULE_COLUMNS = ["type", "size", "W", "H", "Span", "sE", "sC", "D", "L", "P", "count", "lap", "cover", "note"]
+NUMERIC_COLUMNS = ["W", "H", "Span", "sE", "sC", "D", "L", "P", "count", "lap", "cover"]
+DEFAULTS = {"sE": 10.0, "sC": 15.0, "P": 15.0}
+
+
+# === 向量化公式 ===
+def stirrup_lengths(W, H, cover, db):
+    return ((W - 2*cover) + (H - 2*cover)) * 2 + np.maximum(24*db, 20)
+
+
+def stirrup_counts(span, H, sE, sC):
+    # 同 core.stirrup_count：梁端 2H 加密區 @sE，中段 @sC；加密區重疊或 sE=0 時單一間距
+    zE = 2*H
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plain = np.ceil(span / sC) + 1
+        full = np.ceil(span / sE) + 1
+        zoned = np.ceil(zE / sE) * 2 + np.ceil((span - 2*zE) / sC) + 1
+    return np.where(sE <= 0, plain, np.where(zE*2 >= span, full, zoned))
+
+
+def spiral_lengths(D, L, P, cover):
+    circ = np.pi * (D - 2*cover)
+    one_turn = np.sqrt(circ**2 + P**2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return one_turn * (L / P) + 3.0 * circ, one_turn
+
+
+# === 構件表 → 原始資料 ===
+def _frame(rows, note=""):
+    df = pd.DataFrame(rows).reindex(columns=SCHEDULE_COLUMNS)
+    df["type"] = df["type"].fillna("").astype(str).str.strip().str.lower()
+    df["size"] = df["size"].fillna("").astype(str).str.strip()
+    df["note"] = df["note"].fillna("").astype(str).replace("", note)
+    num = df[NUMERIC_COLUMNS].apply(pd.to_numeric, errors="coerce")
+    for col, v in DEFAULTS.items(): num[col] = num[col].fillna(v)
+    return df, num
+
+
+def parse_schedule(rows, cover=4.0, note="", first_row=1, stock_len=None):
+    """將構件表 (DataFrame 或 list of dict) 轉為 raw_data_list 原始資料。
+
+    ``cover``/``note`` 為未填寫時的預設值；指定 ``stock_len`` 時另檢查螺旋箍筋搭接需小於定尺。回傳 ``(items, errors)``；``errors`` 為
+    ``[(列號, 訊息), ...]``，列號自 ``first_row`` 起算，有錯誤的列不會產生原始資料。
+    """
+    df, num = _frame(rows, note)
+    n = len(df)
+    if n == 0: return [], []
+    kind = df["type"].map(MEMBER_TYPES)
+    stir = kind.eq("stirrup").to_numpy()
+    spir = kind.eq("spiral").to_numpy()
+    c = num["cover"].fillna(cover).to_numpy()
+    W, H, span, sE, sC = (num[k].to_numpy() for k in ("W", "H", "Span", "sE", "sC"))
+    D, L, P, count, lap = (num[k].to_numpy() for k in ("D", "L", "P", "count", "lap"))
+    has_count = count > 0
+    sp_len, one_turn = spiral_lengths(D, L, P, c)
+    sp_lap = np.where(np.isnan(lap), round_values(1.5 * one_turn, 1), lap)
+
+    # 逐項檢查 (向量化)，同一列的多個錯誤合併顯示
+    blank = df["type"].eq("").to_numpy() & df["size"].eq("").to_numpy() & num.drop(columns=list(DEFAULTS)).isna().all(axis=1).to_numpy()
+    checks = [
+        (kind.isna().to_numpy(), "未知構件類型 " + df["type"].map(repr)),
+        (kind.isin(["main", "slab"]).to_numpy(), "構件表僅支援箍筋與螺旋箍筋，主筋/版牆筋請用 CLI"),
+        (~df["size"].isin(list(REBAR_DB)).to_numpy(), "未知番號 " + df["size"].map(repr)),
+    ]
+    checks += [(stir & mask, msg) for mask, msg in stirrup_errors(W, H, c, span, sE, sC, count)]
+    checks += [(spir & mask, msg) for mask, msg in spiral_errors(D, L, P, c, count)]
+    if stock_len is not None:
+        checks += [(spir & mask, msg) for mask, msg in lap_errors(sp_len, sp_lap, stock_len)]
+    messages = [[] for _ in range(n)]
+    for mask, msg in checks:
+        mask = mask & ~blank
+        for i in np.flatnonzero(mask):
+            messages[i].append(msg if isinstance(msg, str) else msg.iloc[i])
+    bad = np.array([bool(m) for m in messages]) | blank
+    errors = [(first_row + i, "；".join(m)) for i, m in enumerate(messages) if m]
+
+    db = df["size"].map(lambda s: REBAR_DB[s]['db'] if s in REBAR_DB else np.nan).to_numpy(dtype=np.float64)
+    st_len = stirrup_lengths(W, H, c, db)
+    st_cnt = np.where(has_count, count, stirrup_counts(span, H, sE, sC))
+
+    items = []
+    sizes = df["size"].tolist(); notes = df["note"].tolist()
+    for i in np.flatnonzero(~bad).tolist():
+        if stir[i]:
+            items.append(make_item("stirrup", sizes[i], f"口 {float(W[i])}x{float(H[i])}", float(st_len[i]), 0,
+                                   int(st_cnt[i]), notes[i]))
+        else:
+            items.append(make_item("main", sizes[i], f"◎ D={float(D[i])}", float(sp_len[i]), float(sp_lap[i]),
+                                   int(count[i]) if has_count[i] else 1, notes[i]))
+    return items, errors
+
+
+def read_schedule(file):
+    """讀取 CSV 或 XLSX 構件表 (file 可為路徑或上傳檔案物件)。"""
+    name = str(getattr(file, "name", file)).lower()
+    if name.endswith((".xlsx", ".xlsm")):
+        return pd.read_excel(file, dtype={"type": str, "size": str, "note": str})
+    return pd.read_csv(file, encoding="utf-8-sig", dtype={"type": str, "size": str, "note": str})
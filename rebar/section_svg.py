@@ -0,0 +1,38 @@
+# === 斷面示意圖 (SVG) ===
+# 直接輸出小型 SVG 字串取代 matplotlib 圖表：混凝土外框 (矩形/圓形) 與保護層處的箍筋虛線。
+# 依 (形狀, 尺寸, 保護層) 以 LRU 快取，重繪不需任何繪圖物件，也不會累積記憶體。
+from functools import lru_cache
+
+SVG_SIZE = 300  # px，對應原 figsize=(3, 3)
+PAD = 10        # cm，外框四周留白 (同原 set_xlim(-10, w+10))
+CONC_STYLE = 'fill="#f0f0f0" stroke="#333333" stroke-width="2" vector-effect="non-scaling-stroke"'
+STIR_STYLE = 'fill="none" stroke="red" stroke-width="1.5" stroke-dasharray="6 4" vector-effect="non-scaling-stroke"'
+
+
+def _svg(w, h, body):
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_SIZE}" height="{SVG_SIZE}" '
+            f'viewBox="{-PAD:g} {-PAD:g} {w + 2 * PAD:g} {h + 2 * PAD:g}" preserveAspectRatio="xMidYMid meet">'
+            f'{body}</svg>')
+
+
+@lru_cache(maxsize=256)
+def _render(shape, dims, cover):
+    d = dict(dims)
+    if shape == 'rect':
+        w, h = d['w'], d['h']
+        body = f'<rect x="0" y="0" width="{w:g}" height="{h:g}" {CONC_STYLE}/>'
+        if w > 2*cover and h > 2*cover:
+            body += f'<rect x="{cover:g}" y="{cover:g}" width="{w - 2*cover:g}" height="{h - 2*cover:g}" {STIR_STYLE}/>'
+        return _svg(w, h, body)
+    if shape == 'circle':
+        dia = d['d']; r = dia / 2
+        body = f'<circle cx="{r:g}" cy="{r:g}" r="{r:g}" {CONC_STYLE}/>'
+        if r > cover:
+            body += f'<circle cx="{r:g}" cy="{r:g}" r="{r - cover:g}" {STIR_STYLE}/>'
+        return _svg(dia, dia, body)
+    raise ValueError(f"未知斷面形狀 {shape!r}")
+
+
+def section_svg(shape, dims, cover):
+    """回傳斷面示意 SVG 字串；shape 為 'rect' (dims: w, h) 或 'circle' (dims: d)。"""
+    return _render(shape, tuple(sorted(dims.items())), cover)
@@ -0,0 +1,286 @@
+# === 本機 HTTP/JSON 批次服務 ===
+# 供 ERP/估算腳本取得與介面相同的撿料數字，只使用標準函式庫 http.server，可完全離線執行。
+# 用法: python -m rebar.server --port 8765 --workers 8
+#
+# 端點 (POST 內容皆為 JSON)：
+#   POST /lap     {"fc", "fy", "interpolate", "items": [{"size", "type", "top"}]}   搭接/握裹長度查表
+#   POST /split   {"stock_len", "items": [{"length", "lap"} 或 {"length", "size", "type", "top"}],
+#                  "fc", "fy"}                                                     拆料 (同 split_rebar)
+#   POST /report  {"items": [原始資料] 或 "members": [構件列 (同 CLI 欄位)], "stock_len", "auto_split",
+#                  "unit_price", "fc", "fy", "cover", "rows": false}               番號總重/金額統計 (可附明細列)
+#   type 為 tension/compression/develop；單價預設 23000 元/噸 (同 CLI)。請求內容錯誤回應 400，其餘錯誤 500
+#   GET  /stats   每秒請求數與各端點延遲百分位數 (ms)
+#   GET  /health
+# 請求由固定大小的執行緒池處理；同一請求內相同 (番號, 類型, 頂層) 的搭接查表只計算一次；
+# 清單結果以 chunked 串流逐批寫出，不需先組出完整回應。
+import argparse
+import json
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from itertools import chain, islice
+
+import numpy as np
+
+from rebar.cli import iter_items
+from rebar.core import REBAR_DB, make_item
+from rebar.items import MODES
+from rebar.lap_table import TYPE_MODES, lap_length
+from rebar.report import REPORT_COLUMNS, build_report, items_to_columns, split_counts
+
+MAX_BODY = 64 * 2**20
+STREAM_BATCH = 1000   # 每次序列化的清單項目數
+STREAM_FLUSH = 64 * 1024
+LATENCY_WINDOW = 10_000
+
+
+# === 端點 ===
+class _LapCache:
+    # 單一請求內的查表快取 (強度固定，依 番號/類型/頂層 查詢)
+    def __init__(self, body):
+        self.fc = _strength(body.get("fc", 280)); self.fy = _strength(body.get("fy", 4200))
+        self.interpolate = bool(body.get("interpolate", False))
+        self._memo = {}
+
+    def get(self, size, type_mode="tension", is_top=False):
+        key = (size, type_mode, bool(is_top))
+        hit = self._memo.get(key)
+        if hit is None:
+            if size not in REBAR_DB: raise ValueError(f"未知番號 {size!r}")
+            if type_mode not in TYPE_MODES: raise ValueError(f"未知類型 {type_mode!r} (可用 {'/'.join(TYPE_MODES)})")
+            hit = self._memo[key] = lap_length(self.fc, self.fy, size, type_mode, bool(is_top), self.interpolate)
+        return hit
+
+
+def _strength(v):
+    # 整數強度才能對應 S7-01 表格欄位 (同 CLI)
+    v = float(v)
+    if not v > 0: raise ValueError(f"強度需大於 0 (收到 {v})")
+    return int(v) if v.is_integer() else v
+
+
+def lap_endpoint(body):
+    laps = _LapCache(body)
+    results = []
+    for it in body.get("items", []):
+        t = it.get("type", "tension"); top = bool(it.get("top", False))
+        val, desc = laps.get(it["size"], t, top)
+        results.append({"size": it["size"], "type": t, "top": top, "lap": val, "desc": desc})
+    return {"fc": laps.fc, "fy": laps.fy, "results": iter(results)}
+
+
+def split_endpoint(body):
+    stock_len = float(body.get("stock_len", 1200))
+    items = body.get("items", [])
+    laps = _LapCache(body)
+    length = np.array([float(it["length"]) for it in items], dtype=np.float64)
+    lap = np.array([float(it["lap"]) if "lap" in it else laps.get(it["size"], it.get("type", "tension"), it.get("top", False))[0]
+                    for it in items], dtype=np.float64)
+    # 與 split_rebar 相同的逐次扣減，整批同時計算
+    n_full = np.zeros(len(items), dtype=np.int64); rem = length.copy()
+    long_idx = np.flatnonzero(length > stock_len)
+    if len(long_idx):
+        n_full[long_idx], rem[long_idx] = split_counts(length[long_idx], lap[long_idx], stock_len)
+
+    def results():
+        for n, r, lp in zip(n_full.tolist(), rem.tolist(), lap.tolist()):
+            yield {"lap": lp, "pieces": [stock_len] * n + [r]}
+    return {"stock_len": stock_len, "results": results()}
+
+
+def _raw_item(it):
+    # 原始資料 (同 raw_data_list 欄位)；單位重一律依番號由 REBAR_DB 取得
+    if it.get("size_key") not in REBAR_DB: raise ValueError(f"未知番號 {it.get('size_key')!r}")
+    if it.get("mode", "main") not in MODES: raise ValueError(f"未知模式 {it.get('mode')!r} (可用 {'/'.join(MODES)})")
+    return make_item(it.get("mode", "main"), it["size_key"], it.get("shape_str", ""), float(it["base_len"]),
+                     float(it.get("lap_len", 0)), float(it.get("count", 1)), it.get("note", ""))
+
+
+def report_endpoint(body):
+    stock_len = float(body.get("stock_len", 1200)); auto_split = bool(body.get("auto_split", True))
+    unit_price = float(body.get("unit_price", 23000))
+    errors = []
+    if "members" in body:
+        laps = _LapCache(body)
+        rows = ((i, {k: "" if v is None else str(v) for k, v in m.items()}) for i, m in enumerate(body["members"], 1))
+        items = list(iter_items(rows, laps.fc, laps.fy, float(body.get("cover", 4.0)), errors, laps.interpolate, stock_len))
+    else:
+        items = [_raw_item(it) for it in body.get("items", [])]
+    df = build_report(items_to_columns(items), stock_len, auto_split)
+    order = {k: i for i, k in enumerate(REBAR_DB)}
+    totals = df.groupby("番號", sort=False)["總重"].sum()
+    summary = [{"番號": k, "總重": round(w, 2), "噸數": round(w / 1000, 3), "金額": round(w / 1000 * unit_price)}
+               for k, w in sorted(totals.items(), key=lambda kv: order[kv[0]])]
+    out = {"n_items": len(items), "n_rows": len(df), "summary": summary,
+           "errors": [{"row": n, "error": msg} for n, msg in errors]}
+    if body.get("rows", False):
+        out["rows"] = (dict(zip(REPORT_COLUMNS, r)) for r in df.itertuples(index=False, name=None))
+    return out
+
+
+ROUTES = {"/lap": lap_endpoint, "/split": split_endpoint, "/report": report_endpoint}
+
+
+# === 統計 ===
+class ServiceStats:
+    """累計請求數與各端點最近 ``window`` 筆延遲，提供每秒請求數 (累計與最近 ``recent_s`` 秒) 與百分位數。"""
+
+    def __init__(self, window=LATENCY_WINDOW, recent_s=10.0):
+        self.started = time.perf_counter()
+        self.recent_s = recent_s
+        self._lat = {}; self._count = Counter(); self._errors = Counter()
+        self._done = deque(maxlen=window)  # 完成時間
+        self._window = window
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, ok=True):
+        with self._lock:
+            self._lat.setdefault(endpoint, deque(maxlen=self._window)).append(seconds)
+            self._count[endpoint] += 1
+            self._done.append(time.perf_counter())
+            if not ok: self._errors[endpoint] += 1
+
+    def snapshot(self):
+        with self._lock:
+            lat = {k: np.array(v) * 1000 for k, v in self._lat.items()}
+            count = dict(self._count); errors = dict(self._errors)
+            now = time.perf_counter()
+            recent = sum(1 for t in self._done if now - t <= self.recent_s)
+        uptime = now - self.started
+        total = sum(count.values())
+        endpoints = {}
+        for k, ms in lat.items():
+            p50, p90, p99 = np.percentile(ms, [50, 90, 99]).round(3).tolist()
+            endpoints[k] = {"requests": count[k], "errors": errors.get(k, 0), "p50_ms": p50, "p90_ms": p90,
+                            "p99_ms": p99, "max_ms": round(float(ms.max()), 3)}
+        return {"uptime_s": round(uptime, 3), "requests": total,
+                "requests_per_s": round(total / uptime, 2) if uptime > 0 else 0.0,
+                "recent_requests_per_s": round(recent / min(self.recent_s, uptime), 2) if uptime > 0 else 0.0,
+                "endpoints": endpoints}
+
+
+# === HTTP ===
+def _json_chunks(obj):
+    # 逐段輸出 JSON；值為產生器時以陣列形式分批寫出
+    yield b"{"
+    for n, (k, v) in enumerate(obj.items()):
+        yield (", " if n else "").encode() + json.dumps(k).encode() + b": "
+        if hasattr(v, "__next__"):
+            yield b"["
+            first = True
+            while batch := list(islice(v, STREAM_BATCH)):
+                yield (b"" if first else b", ") + ", ".join(json.dumps(x, ensure_ascii=False) for x in batch).encode()
+                first = False
+            yield b"]"
+        else:
+            yield json.dumps(v, ensure_ascii=False).encode()
+    yield b"}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "rebar-service/1"
+    timeout = 30  # 閒置連線逾時，避免佔住工作執行緒
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose: super().log_message(fmt, *args)
+
+    def _send_json(self, status, obj):
+        data = json.dumps(obj, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health": self._send_json(200, {"status": "ok"})
+        elif self.path == "/stats": self._send_json(200, self.server.stats.snapshot())
+        else: self._send_json(404, {"error": f"未知路徑 {self.path}"})
+
+    def do_POST(self):
+        t0 = time.perf_counter()
+        route = ROUTES.get(self.path)
+        if route is None:
+            self._send_json(404, {"error": f"未知路徑 {self.path}"}); return
+        ok = False
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length > MAX_BODY: raise ValueError("請求內容過大")
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict): raise ValueError("請求內容需為 JSON 物件")
+            chunks = _json_chunks(route(body))
+        except (ValueError, KeyError, TypeError, ZeroDivisionError, AttributeError) as e:
+            # 請求內容錯誤 (欄位缺漏、型別不符、強度為 0 等)
+            self.close_connection = True
+            self._send_json(400, {"error": str(e) if not isinstance(e, KeyError) else f"缺少欄位 {e}"})
+        except Exception as e:
+            # 標頭尚未送出，仍可回應 JSON 錯誤；堆疊記錄於伺服器端
+            self.close_connection = True
+            self.server.handle_error(self.request, self.client_address)
+            self._send_json(500, {"error": f"伺服器內部錯誤: {type(e).__name__}"})
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            # 小片段合併至約 64 KB 再寫出一個 chunk
+            buf = bytearray()
+            for part in chain(chunks, (None,)):
+                if part is not None: buf += part
+                if buf and (part is None or len(buf) >= STREAM_FLUSH):
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(buf), bytes(buf))); buf.clear()
+            self.wfile.write(b"0\r\n\r\n")
+            ok = True
+        finally:
+            self.server.stats.record(self.path, time.perf_counter() - t0, ok)
+
+
+class PooledHTTPServer(HTTPServer):
+    """以固定大小執行緒池處理連線的 HTTPServer。"""
+
+    def __init__(self, address, workers=8, verbose=False):
+        super().__init__(address, _Handler)
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="rebar-http")
+        self.stats = ServiceStats()
+        self.verbose = verbose
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._work, request, client_address)
+
+    def _work(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m rebar.server", description="鋼筋撿料本機 HTTP/JSON 批次服務")
+    ap.add_argument("--host", default="127.0.0.1", help="綁定位址 (預設僅本機 127.0.0.1)")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--workers", type=int, default=8, help="工作執行緒數 (預設 8)")
+    ap.add_argument("-v", "--verbose", action="store_true", help="逐筆輸出請求記錄")
+    args = ap.parse_args(argv)
+
+    server = PooledHTTPServer((args.host, args.port), args.workers, args.verbose)
+    print(f"rebar 服務啟動於 http://{args.host}:{server.server_port} ({args.workers} workers)，Ctrl+C 結束", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.stats.snapshot(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
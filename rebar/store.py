@@ -0,0 +1,115 @@
+# === 專案存檔 (SQLite) ===
+# 原始撿料項目與側邊欄參數存於本機 SQLite；新增/刪除各為一筆 INSERT/DELETE，
+# 不需整份重寫。每筆項目以 SQLite id 識別 (新增時回傳、載入時一併取出)，刪除依 id 進行，
+# 多個 session 同時編輯同一專案也不會刪錯列。載入時一次取出所有列並轉為欄式陣列，直接交給報表引擎展開。
+import json
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from rebar.report import ITEM_FIELDS
+
+NUMERIC_FIELDS = ("base_len", "lap_len", "count", "uw")
+_INSERT = f"INSERT INTO items (project, {', '.join(ITEM_FIELDS)}) VALUES (?{', ?' * len(ITEM_FIELDS)})"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    name TEXT PRIMARY KEY,
+    params TEXT NOT NULL DEFAULT '{}',
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    mode TEXT, size_key TEXT, shape_str TEXT,
+    base_len REAL, lap_len REAL, count INTEGER, uw REAL, note TEXT
+);
+CREATE INDEX IF NOT EXISTS items_project ON items (project, id);
+"""
+
+
+class ProjectStore:
+    """本機專案存檔；同一連線以 lock 保護，可供多個 Streamlit session 共用。"""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def _touch(self, name, params=None):
+        if params is None:
+            self._conn.execute("INSERT INTO projects (name, updated) VALUES (?, ?) "
+                               "ON CONFLICT(name) DO UPDATE SET updated=excluded.updated", (name, time.time()))
+        else:
+            self._conn.execute("INSERT INTO projects (name, params, updated) VALUES (?, ?, ?) "
+                               "ON CONFLICT(name) DO UPDATE SET params=excluded.params, updated=excluded.updated",
+                               (name, json.dumps(params, ensure_ascii=False), time.time()))
+
+    def projects(self):
+        """回傳 [(專案名稱, 項目數, 最後更新時間), ...]，最近更新者在前。"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT p.name, COUNT(i.id), p.updated FROM projects p LEFT JOIN items i ON i.project = p.name "
+                "GROUP BY p.name ORDER BY p.updated DESC").fetchall()
+
+    def exists(self, name):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM projects WHERE name = ?", (name,)).fetchone() is not None
+
+    def save_params(self, name, params):
+        with self._lock, self._conn:
+            self._touch(name, params)
+
+    def _insert(self, name, items):
+        return [self._conn.execute(_INSERT, (name, *(it[f] for f in ITEM_FIELDS))).lastrowid for it in items]
+
+    def append_item(self, name, item):
+        """新增一筆，回傳其 id。"""
+        with self._lock, self._conn:
+            item_id = self._insert(name, [item])[0]
+            self._touch(name)
+        return item_id
+
+    def append_items(self, name, items):
+        """批次新增 (單一交易)，回傳各筆 id。"""
+        with self._lock, self._conn:
+            ids = self._insert(name, items)
+            self._touch(name)
+        return ids
+
+    def delete_items(self, name, ids):
+        # 依 id 刪除 (未存檔的項目 id 為 -1，不會比對到任何列)
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM items WHERE id = ? AND project = ?", ((int(i), name) for i in ids))
+            self._touch(name)
+
+    def save_as(self, name, items, params=None):
+        """另存為新專案，回傳各筆 id；名稱已存在時拋出 ValueError (不覆寫既有專案)。"""
+        with self._lock, self._conn:
+            if self._conn.execute("SELECT 1 FROM projects WHERE name = ?", (name,)).fetchone():
+                raise ValueError(f"專案「{name}」已存在")
+            ids = self._insert(name, items)
+            self._touch(name, params if params is not None else {})
+        return ids
+
+    def load(self, name):
+        """回傳 (參數 dict, 欄式項目)；欄式格式同 report.items_to_columns (另含 id 欄)，可直接交給 build_report。"""
+        with self._lock:
+            row = self._conn.execute("SELECT params FROM projects WHERE name = ?", (name,)).fetchone()
+            rows = self._conn.execute(f"SELECT id, {', '.join(ITEM_FIELDS)} FROM items WHERE project = ? ORDER BY id",
+                                      (name,)).fetchall()
+        params = json.loads(row[0]) if row else {}
+        columns = list(zip(*rows)) if rows else [()] * (len(ITEM_FIELDS) + 1)
+        cols = {f: np.array(c, dtype=np.float64 if f in NUMERIC_FIELDS else object)
+                for f, c in zip(ITEM_FIELDS, columns[1:])}
+        cols["id"] = np.array(columns[0], dtype=np.int64)
+        return params, cols
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,125 @@
+# === 情境比較：定尺 × 拆料模式 × 材料強度 ===
+# 一次計算所有定尺、拆料開/關與 S7-01 表列強度組合下的總重、搭接支數/處數與金額，
+# 不需逐一切換側邊欄。項目數值欄位打包為單一陣列放在 shared memory，
+# 各強度組合交由 process pool 平行計算 (子程序只讀取，不複製項目資料)。
+# 子程序以 forkserver (不支援時 spawn) 啟動：Streamlit 伺服器為多執行緒，直接 fork 可能死結。
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from rebar.core import S7_DATA
+from rebar.lap_table import SIZE_CODE, resolved_table
+from rebar.report import round_values, split_counts
+
+STOCK_LENS_M = (9, 10, 12, 14, 15)
+GRADE_PAIRS = tuple((fy, fc) for fy in sorted(S7_DATA) for fc in sorted(S7_DATA[fy]))
+SWEEP_COLUMNS = ["f_y", "f'c", "定尺(m)", "自動拆料", "總重(kg)", "噸數", "搭接支數", "搭接處數", "金額", "備註"]
+MIN_PARALLEL = 5_000  # 項目數少於此值時直接在本程序計算 (啟動子程序反而較慢)
+
+# 打包陣列的列 (row) 順序
+_B, _LAP, _CNT, _UW, _CODE, _KIND, _STIR = range(7)
+
+_shared = None  # 子程序：(SharedMemory, ndarray)
+
+
+def lap_kinds(cols, fc, fy, interpolate=False):
+    """推定各項目搭接長度的查表類型 (0 拉力/1 頂層/2 壓力)；手動輸入或非查表值為 -1 (各情境維持原值)。"""
+    n = len(cols['base_len'])
+    kinds = np.full(n, -1, dtype=np.int64)
+    main = np.flatnonzero((cols['mode'] == 'main') & (cols['lap_len'] > 0))
+    if len(main):
+        vals, _ = resolved_table(fc, fy, interpolate)
+        codes = np.fromiter((SIZE_CODE[s] for s in cols['size_key'][main]), dtype=np.intp, count=len(main))
+        match = vals[codes, :3] == cols['lap_len'][main, None]
+        kinds[main] = np.where(match.any(axis=1), match.argmax(axis=1), -1)
+    return kinds
+
+
+def pack_items(cols, fc, fy, interpolate=False):
+    """將欄式項目打包為 (7, n) float64 陣列：長度、搭接、支數、單位重、番號代碼、搭接類型、是否箍筋。"""
+    n = len(cols['base_len'])
+    arr = np.empty((7, n), dtype=np.float64)
+    arr[_B] = cols['base_len']; arr[_LAP] = cols['lap_len']; arr[_CNT] = cols['count']; arr[_UW] = cols['uw']
+    arr[_CODE] = np.fromiter((SIZE_CODE[s] for s in cols['size_key']), dtype=np.float64, count=n)
+    arr[_KIND] = lap_kinds(cols, fc, fy, interpolate)
+    arr[_STIR] = cols['mode'] == 'stirrup'
+    return arr
+
+
+def _scenario(b_len, lap, count, uw, stirrup, stock_len, auto_split):
+    # 回傳 (總重, 搭接支數, 搭接處數)；重量逐列四捨五入後加總，與 build_report 的總重一致
+    passthrough = stirrup | (b_len <= stock_len)
+    long_idx = np.flatnonzero(~passthrough)
+    if auto_split:
+        n_full = np.zeros(len(b_len), dtype=np.int64); rem = b_len.copy()
+        if len(long_idx):
+            n_full[long_idx], rem[long_idx] = split_counts(b_len[long_idx], lap[long_idx], stock_len)
+        weight = (n_full * round_values((stock_len / 100) * uw * count, 2)).sum() + round_values((rem / 100) * uw * count, 2).sum()
+        laps = n_full
+    else:
+        laps = np.floor(b_len / stock_len)
+        laps -= (np.mod(b_len, stock_len) == 0)
+        laps = np.where(passthrough, 0, laps).astype(np.int64)
+        weight = round_values(((b_len + laps * lap) / 100) * uw * count, 2).sum()
+    return float(weight), int(count[laps > 0].sum()), int((laps * count).sum())
+
+
+def _run_pair(arr, fy, fc, stock_lens_m, unit_price):
+    vals, _ = resolved_table(fc, fy)
+    kind = arr[_KIND].astype(np.intp)
+    keep = kind < 0
+    lap = np.where(keep, arr[_LAP], vals[arr[_CODE].astype(np.intp), np.where(keep, 0, kind)])
+    stirrup = arr[_STIR].astype(bool)
+    rows = []
+    for stock_m in stock_lens_m:
+        for auto_split in (True, False):
+            try:
+                weight, bars, splices = _scenario(arr[_B], lap, arr[_CNT], arr[_UW], stirrup, stock_m * 100, auto_split)
+                rows.append((fy, fc, stock_m, auto_split, weight, weight / 1000, bars, splices, weight / 1000 * unit_price, ""))
+            except ValueError as e:
+                rows.append((fy, fc, stock_m, auto_split, np.nan, np.nan, 0, 0, np.nan, str(e)))
+    return rows
+
+
+def _mp_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _attach(name, shape):
+    global _shared
+    shm = shared_memory.SharedMemory(name=name)
+    arr = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    arr.flags.writeable = False
+    _shared = (shm, arr)
+
+
+def _run_shared(task):
+    return _run_pair(_shared[1], *task)
+
+
+def sweep(cols, fc, fy, interpolate=False, stock_lens_m=STOCK_LENS_M, unit_price=0, grade_pairs=GRADE_PAIRS,
+          workers=None, min_parallel=MIN_PARALLEL):
+    """計算所有 (f_y, f'c) × 定尺 × 拆料模式 情境，回傳比較表 DataFrame。
+
+    ``cols`` 為 :func:`rebar.report.items_to_columns` 格式；``fc``/``fy`` 為項目建立時使用的強度，
+    用來判斷哪些搭接長度來自查表 (各情境改用該強度的表值)，其餘維持原值。
+    """
+    arr = pack_items(cols, fc, fy, interpolate)
+    tasks = [(p_fy, p_fc, tuple(stock_lens_m), unit_price) for p_fy, p_fc in grade_pairs]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1 or arr.shape[1] < min_parallel:
+        results = [_run_pair(arr, *t) for t in tasks]
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        try:
+            np.ndarray(arr.shape, dtype=np.float64, buffer=shm.buf)[:] = arr
+            with ProcessPoolExecutor(workers, mp_context=_mp_context(), initializer=_attach, initargs=(shm.name, arr.shape)) as pool:
+                results = list(pool.map(_run_shared, tasks))
+        finally:
+            shm.close(); shm.unlink()
+    return pd.DataFrame([r for rows in results for r in rows], columns=SWEEP_COLUMNS)
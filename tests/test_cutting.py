@@ -0,0 +1,44 @@
+# === 定尺排料 pack_ffd / cutting_plan ===
+import random
+from collections import Counter
+
+import pytest
+
+from rebar.bench import members_to_items, synthetic_members
+from rebar.core import REBAR_DB
+from rebar.cutting import cutting_plan, pack_ffd
+from rebar.report import build_report
+
+
+@pytest.mark.parametrize("improve", (True, False))
+@pytest.mark.parametrize("stock_lens", ([12000], [9000, 12000], [9000, 10000, 12000, 14000, 15000]))
+def test_pack_ffd_invariants(stock_lens, improve):
+    r = random.Random(len(stock_lens))
+    lengths = [r.randrange(300, 16000, 5) for _ in range(300)] + stock_lens + [6000, 4000, 16500]
+    counts = [r.randrange(1, 40) for _ in lengths]
+    demand = Counter()
+    for L, m in zip(lengths, counts): demand[L] += m
+    bars, oversize = pack_ffd(lengths, counts, stock_lens, improve)
+
+    # 超過最大定尺者全數回報，不放入任何定尺
+    assert oversize == {L: m for L, m in demand.items() if L > max(stock_lens)}
+    placed = Counter()
+    for stock, pat, n in bars:
+        assert stock in stock_lens and n > 0
+        assert sum(L * k for L, k in pat) <= stock
+        for L, k in pat: placed[L] += k * n
+    # 其餘每一段恰好放入一次
+    assert placed == Counter({L: m for L, m in demand.items() if L not in oversize})
+
+
+def test_pack_ffd_requires_stock():
+    with pytest.raises(ValueError):
+        pack_ffd([1000], [1], [])
+
+
+def test_cutting_plan_sorted_by_size():
+    df = build_report(members_to_items(synthetic_members(500, seed=2)), 1200, True)
+    patterns, summary = cutting_plan(df.iloc[::-1], [900, 1200])
+    order = list(REBAR_DB)
+    assert summary["番號"].tolist() == sorted(set(df["番號"]), key=order.index)
+    assert patterns["番號"].map(order.index).is_monotonic_increasing
@@ -0,0 +1,56 @@
+# === S7-01 預編譯表 vs lookup_data 逐格比對 ===
+import math
+
+import pytest
+
+from rebar.core import REBAR_DB, S7_DATA, lookup_data
+from rebar.lap_table import DESC_INTERP, FC_VALUES, FY_VALUES, lap_length, lap_lengths
+
+FYS = sorted(set(FY_VALUES) | {2800, 3500, 4200})
+FCS = sorted(set(FC_VALUES) | {180, 230, 245, 300, 350, 420})
+CASES = [(size, mode, top) for size in REBAR_DB for mode in ('tension', 'compression', 'develop') for top in (False, True)]
+
+
+def _table_key(mode, top):
+    if mode in ('compression', 'develop'): return mode
+    return 'tension_Top' if top else 'tension_B'
+
+
+def interp_reference(fc, fy, size, mode, top):
+    # 逐筆內插：僅在該 fy 相鄰的表列 f'c 間內插，任一端無表值或超出範圍時同 lookup_data
+    fcs = sorted(S7_DATA.get(fy, {}))
+    lo = [v for v in fcs if v < fc]; hi = [v for v in fcs if v > fc]
+    if fc in fcs or not lo or not hi: return lookup_data(fc, fy, size, mode, top)
+    key = _table_key(mode, top)
+    v0 = S7_DATA[fy][lo[-1]][key].get(size, 0); v1 = S7_DATA[fy][hi[0]][key].get(size, 0)
+    if not v0 or not v1: return lookup_data(fc, fy, size, mode, top)
+    return math.ceil(v0 + (v1 - v0) * ((fc - lo[-1]) / (hi[0] - lo[-1]))), DESC_INTERP
+
+
+@pytest.mark.parametrize("fy", FYS)
+@pytest.mark.parametrize("fc", FCS)
+def test_matches_lookup_data(fc, fy):
+    for size, mode, top in CASES:
+        assert lap_length(fc, fy, size, mode, top) == lookup_data(fc, fy, size, mode, top), (size, mode, top)
+
+
+@pytest.mark.parametrize("fy", FYS)
+@pytest.mark.parametrize("fc", FCS)
+def test_interpolate(fc, fy):
+    for size, mode, top in CASES:
+        assert lap_length(fc, fy, size, mode, top, True) == interp_reference(fc, fy, size, mode, top), (size, mode, top)
+
+
+@pytest.mark.parametrize("interpolate", (False, True))
+@pytest.mark.parametrize("fy", FYS)
+@pytest.mark.parametrize("fc", FCS)
+def test_batch_matches_scalar(fc, fy, interpolate):
+    sizes, modes, tops = zip(*CASES)
+    expected = [lap_length(fc, fy, *case, interpolate)[0] for case in CASES]
+    assert lap_lengths(fc, fy, sizes, modes, tops, interpolate).tolist() == expected
+
+
+def test_develop_top_formula():
+    # 非表列強度的握裹長度，頂層筋依公式乘 1.3
+    assert lap_length(300, 4200, '#5', 'develop', True) == lookup_data(300, 4200, '#5', 'develop', True) == (120, "公式估算")
+    assert lap_length(280, 4200, '#5', 'develop', True) == (61, "標準圖查表")
@@ -0,0 +1,60 @@
+# === 構件類型與檢查：CLI parse_member 與批次構件表 parse_schedule 一致 ===
+import pytest
+
+from rebar.cli import iter_items, parse_member
+from rebar.schedule import parse_schedule
+
+ROWS = [
+    {"type": "梁", "size": "#4", "W": "40", "H": "60", "Span": "600"},
+    {"type": "Column", "size": "#3", "W": "50", "H": "50", "count": "12", "sE": "0"},
+    {"type": "樁", "size": "#4", "D": "100", "L": "1800", "P": "10"},
+    {"type": " pile ", "size": "#3", "D": "80", "L": "900", "count": "2", "lap": "50"},
+]
+BAD_ROWS = [
+    {"type": "beam", "size": "#4", "W": "40"},
+    {"type": "柱", "size": "#4", "W": "6", "H": "60", "count": "-1"},
+    {"type": "stirrup", "size": "#4", "W": "40", "H": "60", "Span": "600", "sC": "0"},
+    {"type": "spiral", "size": "#4", "D": "8", "L": "900"},
+    {"type": "bogus", "size": "#4"},
+]
+
+
+def test_schedule_matches_cli():
+    items, errors = parse_schedule(ROWS)
+    assert errors == []
+    assert items == [parse_member(r, 280, 4200, 4.0) for r in ROWS]
+
+
+@pytest.mark.parametrize("row", BAD_ROWS)
+def test_same_errors(row):
+    items, errors = parse_schedule([row])
+    assert items == [] and len(errors) == 1
+    with pytest.raises(ValueError) as e:
+        parse_member(row, 280, 4200, 4.0)
+    assert str(e.value) == errors[0][1]
+
+
+def test_schedule_rejects_main_bars():
+    items, errors = parse_schedule([{"type": "主筋", "size": "#5", "L": "600"}])
+    assert items == [] and "主筋" in errors[0][1]
+    assert parse_member({"type": "主筋", "size": "#5", "L": "600"}, 280, 4200, 4.0)["size_key"] == "#5"
+
+
+def test_schedule_reports_lap_over_stock_length():
+    # 1.5 圈預設搭接 (約 905 cm) 超過 9 m 定尺：列為該列錯誤，而非在展開報表時才失敗
+    row = {"type": "樁", "size": "#4", "D": "200", "L": "1800", "P": "10"}
+    items, errors = parse_schedule([row], stock_len=900)
+    assert items == [] and errors == [(1, "搭接長度需小於定尺長度")]
+    assert len(parse_schedule([row], stock_len=1200)[0]) == 1
+
+
+@pytest.mark.parametrize("row, msg", [
+    ({"type": "main", "size": "#5", "L": "3000", "count": "1", "lap": "1300"}, "搭接長度需小於定尺長度"),
+    ({"type": "main", "size": "#5", "L": "3000", "count": "-2"}, "支數不可為負"),
+    ({"type": "slab", "size": "#4", "L": "600", "count": "-1"}, "支數不可為負"),
+])
+def test_cli_row_errors(row, msg):
+    errors = []
+    rows = [(2, row), (3, {"type": "main", "size": "#5", "L": "3000", "count": "2"})]
+    items = list(iter_items(iter(rows), 280, 4200, 4.0, errors, stock_len=1200))
+    assert len(items) == 1 and errors == [(2, msg)]
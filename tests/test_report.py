@@ -0,0 +1,62 @@
+# === build_report 欄式展開 vs 原逐筆迴圈 (split_rebar / 搭接處數) ===
+import math
+
+import pytest
+
+from rebar.bench import members_to_items, synthetic_members
+from rebar.core import make_item, split_rebar
+from rebar.report import build_report
+
+STOCK_LENS = (900, 1000, 1200, 1400, 1500)
+
+
+def loop_report(items, stock_len, auto_split):
+    # 原 app.py 逐筆展開迴圈 (向量化前的參考實作)
+    display_data = []
+    for raw_idx, item in enumerate(items):
+        b_len = item['base_len']; count = item['count']; lap = item['lap_len']; uw = item['uw']
+        if item['mode'] == 'stirrup' or b_len <= stock_len:
+            display_data.append({
+                "raw_idx": raw_idx, "番號": item['size_key'], "形狀": item['shape_str'],
+                "單支長": round(b_len, 1), "支數": int(count), "總長(cm)": round(b_len * count, 1),
+                "單位重": uw, "總重": round((b_len/100)*uw*count, 2), "備註": item['note']})
+        elif auto_split:
+            pieces = split_rebar(b_len, stock_len, lap)
+            for p_idx, p_len in enumerate(pieces):
+                part_note = item['note'] + f" (Part {p_idx+1}/{len(pieces)} {'定尺' if p_len==stock_len else '餘料'})"
+                display_data.append({
+                    "raw_idx": raw_idx, "番號": item['size_key'], "形狀": item['shape_str'],
+                    "單支長": round(p_len, 1), "支數": int(count), "總長(cm)": round(p_len * count, 1),
+                    "單位重": uw, "總重": round((p_len/100)*uw*count, 2), "備註": part_note})
+        else:
+            laps = math.floor(b_len / stock_len)
+            if b_len % stock_len == 0: laps -= 1
+            total_merge_len = b_len + laps * lap
+            display_data.append({
+                "raw_idx": raw_idx, "番號": item['size_key'], "形狀": item['shape_str'],
+                "單支長": round(total_merge_len, 1), "支數": int(count), "總長(cm)": round(total_merge_len * count, 1),
+                "單位重": uw, "總重": round((total_merge_len/100)*uw*count, 2), "備註": item['note'] + f" (含搭接{laps}處)"})
+    return display_data
+
+
+def _edge_items():
+    # 定尺整數倍、剛好超過定尺、非整數搭接長度、超長箍筋
+    items = []
+    for stock in STOCK_LENS:
+        for k in (1, 2, 3):
+            for lap in (47.5, 63.3, 120.0):
+                items.append(make_item("main", "#5", f"L={stock * k}", float(stock * k), lap, 3, "edge"))
+                items.append(make_item("main", "#7", f"L={stock * k + 0.1}", stock * k + 0.1, lap, 2, "edge"))
+    items.append(make_item("stirrup", "#4", "口 400x500", 1850.0, 0, 7, "stirrup"))
+    items.append(make_item("main", "#10", "L=2777.7", 2777.7, 98.6, 1, ""))
+    return items
+
+
+ITEMS = members_to_items(synthetic_members(3000, seed=11)) + _edge_items()
+
+
+@pytest.mark.parametrize("auto_split", (True, False))
+@pytest.mark.parametrize("stock_len", STOCK_LENS)
+def test_matches_loop(stock_len, auto_split):
+    got = build_report(ITEMS, stock_len, auto_split).to_dict("records")
+    assert got == loop_report(ITEMS, stock_len, auto_split)
@@ -0,0 +1,54 @@
+# === ReportCache 增量展開 vs build_report 整批展開 ===
+import random
+
+import numpy as np
+import pandas as pd
+
+from rebar.bench import members_to_items, synthetic_members
+from rebar.items import ItemTable
+from rebar.report import ReportCache, build_report
+
+SETTINGS = [(1200, True), (1200, False), (900, True), (1500, False), (1000, True)]
+
+
+def _check(cache, table, settings):
+    df = cache.sync(table, *settings).frame()
+    ref = build_report(table, *settings)
+    assert len(df) == len(ref)
+    if len(ref):
+        pd.testing.assert_frame_equal(df.astype(str), ref.astype(str))
+        got = cache.summary().set_index("番號")["總重"]; want = ref.groupby("番號")["總重"].sum()
+        assert list(got.index) == list(want.index) and np.allclose(got.to_numpy(), want.to_numpy())
+
+
+def test_incremental_edits_match_full_report():
+    r = random.Random(1)
+    pool = members_to_items(synthetic_members(2000, seed=3))
+    table = ItemTable(pool[:300]); cache = ReportCache(keep_settings=3)
+    cur = SETTINGS[0]
+    for _ in range(80):
+        op = r.random()
+        if op < 0.3:
+            it = r.choice(pool); cache.append(it, *cur); table.append(it)
+        elif op < 0.4:
+            its = r.sample(pool, r.randrange(1, 50)); cache.extend(its, *cur); table.extend(its)
+        elif op < 0.6 and len(table):
+            i = r.randrange(len(table)); cache.pop(i); table.pop(i)
+        elif op < 0.7 and len(table):
+            idx = r.sample(range(len(table)), min(len(table), r.randrange(1, 30)))
+            r.shuffle(idx); cache.delete(idx); table.delete(idx)
+        else:
+            cur = r.choice(SETTINGS)
+        _check(cache, table, cur)
+
+
+def test_deleted_items_are_not_retained():
+    items = members_to_items(synthetic_members(500))
+    table = ItemTable(items); cache = ReportCache()
+    cache.sync(table, 1200, True); cache.sync(table, 1200, False)
+    cache.delete(list(range(len(table)))); table.clear()
+    cache.extend(items[:10], 1200, False); table.extend(items[:10])
+    _check(cache, table, (1200, False))
+    _check(cache, table, (1200, True))
+    assert all(exp.rows.n <= sum(len(build_report(items[:10], *s)) for s in ((1200, True), (1200, False)))
+               for exp in cache._exp.values())